@@ -0,0 +1,67 @@
+"""
+Autenticacao que carrega o usuario junto com o seu cliente.
+
+Quase toda pagina da loja le `request.user.customer` (`get_context`). O
+`AuthenticationMiddleware` daqui carrega o usuario da sessao com
+`select_related("customer")`, trocando as duas consultas (usuario e cliente) por uma.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import middleware
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import AnonymousUser
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+def get_backend_user(backend, user_id):
+    """
+    Funcao equivalente a `ModelBackend.get_user`, mas que carrega o cliente do usuario.
+    Outros backends carregam o usuario do seu jeito.
+    """
+    if not isinstance(backend, ModelBackend):
+        return backend.get_user(user_id)
+    user_model = auth.get_user_model()
+    try:
+        user = user_model._default_manager.select_related("customer").get(pk=user_id)
+    except user_model.DoesNotExist:
+        return None
+    return user if backend.user_can_authenticate(user) else None
+
+
+def get_user(request):
+    """
+    Funcao equivalente a `django.contrib.auth.get_user`, com o usuario carregado por
+    `get_backend_user`.
+    """
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    user = get_backend_user(auth.load_backend(backend_path), user_id)
+    # the session is only valid while the password (its hash) is the same
+    if hasattr(user, "get_session_auth_hash"):
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if not session_hash or not constant_time_compare(
+            session_hash, user.get_session_auth_hash()
+        ):
+            request.session.flush()
+            user = None
+    return user or AnonymousUser()
+
+
+class AuthenticationMiddleware(middleware.AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: self.get_cached_user(request))
+
+    @staticmethod
+    def get_cached_user(request):
+        if not hasattr(request, "_cached_user"):
+            request._cached_user = get_user(request)
+        return request._cached_user
@@ -0,0 +1,39 @@
+"""
+Hashers de senha com o custo definido nas settings.
+
+O hasher preferido (`settings.PASSWORD_HASHER`) gera as senhas novas; os demais da lista
+`PASSWORD_HASHERS` apenas verificam as senhas existentes. Como o `must_update` dos
+hashers compara o custo da senha guardada com o atual, toda senha gerada com outro
+hasher ou outro custo eh refeita no proximo login bem sucedido (`check_password`).
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """Classe que usa o numero de iteracoes de `settings.PASSWORD_PBKDF2_ITERATIONS`"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Classe que usa os custos de `settings.PASSWORD_ARGON2_*`. Depende do pacote
+    argon2-cffi.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        # in KiB
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
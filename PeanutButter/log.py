@@ -0,0 +1,180 @@
+"""
+Logging estruturado e fora da thread da requisicao.
+
+Os handlers `QueueHandler` apenas enfileiram os registros; a formatacao (JSON) e a
+escrita acontecem em uma thread (`QueueListener`) por processo. Cada registro leva o id
+da requisicao (`RequestIdMiddleware`) e os loggers mais verbosos podem ser amostrados
+(`SamplingFilter`).
+"""
+
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import logging
+from logging import handlers
+import os
+import queue
+import random
+import re
+import threading
+from uuid import uuid4
+
+from django.core.signals import request_finished
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# ids sent by the router (Heroku) are reused, anything else is replaced
+REQUEST_ID_RE = re.compile(r"^[\w-]{1,200}$")
+# attributes of every LogRecord, everything else was passed with `extra`
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_request_id = ContextVar("request_id", default=None)
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class RequestIdMiddleware:
+    """
+    Classe que identifica cada requisicao, para correlacionar os seus registros de log.
+    O id vem do header `X-Request-ID` (quando valido) e volta na resposta.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid4().hex
+        # kept until the response is closed: Django logs error responses (django.request)
+        # after the middlewares
+        _request_id.set(request_id)
+        response = self.get_response(request)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+def clear_request_id(**kwargs):
+    _request_id.set(None)
+
+
+request_finished.connect(clear_request_id, dispatch_uid="clear_request_id")
+
+
+class RequestIdFilter(logging.Filter):
+    """Classe que adiciona o id da requisicao atual aos registros"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Classe que mantem apenas uma fracao dos registros abaixo de WARNING dos loggers
+    configurados. Avisos e erros nunca sao descartados.
+
+    Args:
+        rates (dict): {nome do logger: fracao mantida}. Vale para o logger e os seus
+            filhos; o nome mais especifico prevalece.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = sorted((rates or {}).items(), key=lambda item: -len(item[0]))
+
+    def get_rate(self, name):
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(f"{prefix}."):
+                return rate
+        return 1
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.get_rate(record.name)
+
+
+class JsonFormatter(logging.Formatter):
+    """Classe que formata cada registro como um objeto JSON em uma linha"""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "process": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in data:
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class QueueHandler(handlers.QueueHandler):
+    """
+    Classe que enfileira os registros para uma thread que os formata e escreve em
+    `stream`. A fila eh limitada: quando cheia, os registros sao descartados em vez de
+    bloquear a requisicao.
+
+    Args:
+        stream: Destino dos registros. Padrao: sys.stderr.
+        maxsize (int): Tamanho maximo da fila.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self.listener = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        # formatting happens in the listener thread, with the target's formatter
+        self.target.setFormatter(fmt)
+
+    def start(self):
+        # threads don't survive a fork (gunicorn --preload), so each process has its own
+        with self.start_lock:
+            if self.pid != os.getpid():
+                self.listener = handlers.QueueListener(self.queue, self.target)
+                self.listener.start()
+                self.pid = os.getpid()
+
+    def stop(self):
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()  # writes what is still in the queue
+        self.listener = None
+
+    def prepare(self, record):
+        # like the stdlib, the message is interpolated now: in the listener, mutable
+        # args could have changed and a model's __str__ would query the database off the
+        # request thread. The traceback too, while its frames still exist. Only the JSON
+        # and the writing are left to the listener
+        record = copy.copy(record)  # other handlers still get the original
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            formatter = self.target.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
@@ -0,0 +1,13 @@
+"""
+Storage das imagens de produtos (S3) em producao.
+
+Fica fora de PeanutButter.storage_backends para que o storage dos arquivos estaticos,
+usado desde a primeira requisicao, nao importe o boto3.
+"""
+
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+class MediaStorage(S3Boto3Storage):
+    location = "media"
+    file_overwrite = True
@@ -0,0 +1,142 @@
+"""
+Backend PostgreSQL com verificacao das conexoes persistentes e pool opcional.
+
+Chaves extras do `settings.DATABASES`:
+    CONN_HEALTH_CHECKS (bool): Verifica (`SELECT 1`) uma conexao reaproveitada antes do
+        seu primeiro uso em cada requisicao e reconecta se ela caiu (reinicio ou failover
+        do servidor, timeout de inatividade), em vez de falhar a requisicao.
+    POOL_SIZE (int): Se maior que zero, as conexoes vem de um pool de ate POOL_SIZE
+        conexoes por processo e voltam para ele ao fim de cada requisicao. Pensado para o
+        ponto de entrada ASGI (e workers com threads), em que as views sincronas rodam em
+        threads diferentes e cada thread manteria a sua propria conexao persistente.
+    POOL_TIMEOUT (int): Segundos de espera por uma conexao livre do pool.
+"""
+
+import os
+import threading
+
+from psycopg2 import pool as psycopg2_pool
+
+from django.db.backends.postgresql import base
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Classe que limita o pool do psycopg2, que falha em vez de esperar quando cheio"""
+
+    def __init__(self, size, timeout, conn_params):
+        self.pool = psycopg2_pool.ThreadedConnectionPool(0, size, **conn_params)
+        self.slots = threading.BoundedSemaphore(size)
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2_pool.PoolError(
+                f"Nenhuma conexao livre no pool em {self.timeout}s"
+            )
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            # rolls back open transactions and discards closed connections
+            self.pool.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+
+def get_pool(alias, size, timeout, conn_params):
+    # forked workers (gunicorn) must not share the parent's sockets
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(size, timeout, conn_params)
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Classe que define o backend PostgreSQL da loja"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+
+    @property
+    def pool_size(self):
+        return self.settings_dict.get("POOL_SIZE") or 0
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_size:
+            return super().get_new_connection(conn_params)
+
+        pool = get_pool(
+            self.alias,
+            self.pool_size,
+            self.settings_dict.get("POOL_TIMEOUT", 30),
+            conn_params,
+        )
+        connection = pool.getconn()
+        if self.health_check_enabled and not self._is_connection_usable(connection):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = options.get(
+            "isolation_level", connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if not self.pool_size:
+            return super()._close()
+        pool = _pools.get((self.alias, os.getpid()))
+        if pool is None:
+            # a connection inherited from the parent process
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+
+    @staticmethod
+    def _is_connection_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                # Django can't switch to autocommit inside the implicit transaction
+                connection.rollback()
+        except base.Database.Error:
+            return False
+        return True
+
+    def connect(self):
+        super().connect()
+        # a brand new connection doesn't need to be checked
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # runs when each request starts and finishes
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_check_enabled
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self._is_connection_usable(self.connection):
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
@@ -0,0 +1,118 @@
+"""
+Leituras nas replicas do banco de dados.
+
+Por padrao todas as consultas vao para o banco `default`. As leituras das views de
+`settings.REPLICA_READ_VIEWS` (pelo nome da url) e dos blocos/funcoes decorados com
+`replica_reads` vao para uma das replicas de `settings.REPLICA_DATABASES`. Escritas,
+leituras dentro de transacoes e leituras de sessoes continuam no `default`.
+
+Depois de uma requisicao que escreve (POST etc.: carrinho, checkout, cadastro) o cliente
+recebe um cookie que fixa as suas leituras no `default` por
+`settings.REPLICA_STICKY_SECONDS`, de forma que ele sempre ve o que acabou de escrever,
+mesmo com atraso na replicacao.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import random
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = "db_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# sessions are read right after being written (login, cart), so they never lag behind
+PRIMARY_ONLY_APPS = ("sessions",)
+
+_read_alias = ContextVar("read_alias", default=None)
+
+
+@contextmanager
+def _use_replica():
+    replicas = settings.REPLICA_DATABASES
+    token = _read_alias.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_reads(func=None):
+    """
+    Funcao que envia as leituras de um bloco (`with replica_reads():`) ou de uma funcao
+    (`@replica_reads`) para uma replica.
+    """
+    if func is None:
+        return _use_replica()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with _use_replica():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Classe que define o roteador das leituras para as replicas"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # related objects are read from the same database as the instance
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same data as the default database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
+
+
+class ReplicaMiddleware:
+    """
+    Classe que envia as leituras das views de `settings.REPLICA_READ_VIEWS` para uma
+    replica e fixa no `default` as leituras de quem acabou de escrever.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica_reads = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.replica_reads is not None:
+                request.replica_reads.__exit__(None, None, None)
+
+        if request.method not in SAFE_METHODS and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.REPLICA_DATABASES
+            and request.method in SAFE_METHODS
+            and STICKY_COOKIE not in request.COOKIES
+            and request.resolver_match.url_name in settings.REPLICA_READ_VIEWS
+        ):
+            request.replica_reads = replica_reads()
+            request.replica_reads.__enter__()
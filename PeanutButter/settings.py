@@ -10,7 +10,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 import os
 from django.contrib.messages import constants as messages
 
-import django_heroku
+import dj_database_url
 
 PRODUCTION = os.environ.get("PRODUCTION", False)
 if not PRODUCTION:
@@ -38,7 +38,8 @@ if not PRODUCTION:
 else:
     SECRET_KEY = os.environ.get("SECRET_KEY")
 
-ALLOWED_HOSTS = ["helgas.herokuapp.com", "127.0.0.1"]
+# django_heroku used to override the host list with "*", which is kept as the default
+ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "*").split(",")
 
 # Application definition
 DEFAULT_APPS = [
@@ -70,24 +71,56 @@ INSTALLED_APPS = DEFAULT_APPS + LOCAL_APPS + THIRD_PARTY_APPS
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 
 MIDDLEWARE = [
+    "PeanutButter.log.RequestIdMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "PeanutButter.auth.AuthenticationMiddleware",
+    "PeanutButter.replicas.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
 ROOT_URLCONF = "PeanutButter.urls"
 
+# Logging
+# Records are queued by PeanutButter.log.QueueHandler and formatted (JSON in production)
+# and written by a thread, off the request. Each record carries the request id
+# (RequestIdMiddleware) and records below WARNING can be sampled per logger
+
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json" if PRODUCTION else "text")
+# fraction of the records below WARNING that are kept, per logger (and its children)
+LOG_SAMPLE_RATES = {
+    # SQL statements are only logged at DEBUG (and only with settings.DEBUG on)
+    "django.db.backends": float(
+        os.environ.get("DJANGO_DB_LOG_SAMPLE_RATE", 0.1 if PRODUCTION else 1)
+    ),
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "PeanutButter.log.RequestIdFilter"},
+        "sampling": {
+            "()": "PeanutButter.log.SamplingFilter",
+            "rates": LOG_SAMPLE_RATES,
+        },
+    },
+    "formatters": {
+        "json": {"()": "PeanutButter.log.JsonFormatter"},
+        "text": {
+            "format": "%(asctime)s [%(levelname)s] %(name)s [%(request_id)s] %(message)s"
+        },
+    },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler",
+            "class": "PeanutButter.log.QueueHandler",
+            "stream": "ext://sys.stdout",
+            "formatter": LOG_FORMAT,
+            "filters": ["request_id", "sampling"],
         },
         "mail_admins": {
             "level": "ERROR",
@@ -98,17 +131,43 @@ LOGGING = {
     "loggers": {
         "django": {
             "handlers": ["console"],
-            "level": os.environ.get("DJANGO_LOG_LEVEL", "DEBUG"),
+            "level": os.environ.get("DJANGO_LOG_LEVEL", "INFO"),
+        },
+        # DEBUG logs every SQL statement, which only makes sense for a while and sampled
+        "django.db.backends": {
+            "handlers": ["console"],
+            "level": os.environ.get("DJANGO_DB_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        "store": {
+            "handlers": ["console"],
+            "level": os.environ.get("STORE_LOG_LEVEL", "INFO"),
+        },
+        "PeanutButter": {
+            "handlers": ["console"],
+            "level": os.environ.get("STORE_LOG_LEVEL", "INFO"),
         },
     },
 }
 
+# Templates are compiled once per process outside of DEBUG (cached loader), and the
+# store templates are compiled when the WSGI/ASGI application starts (see
+# store.template_warmup)
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": (
+                TEMPLATE_LOADERS
+                if DEBUG
+                else [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)]
+            ),
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -120,6 +179,12 @@ TEMPLATES = [
     },
 ]
 
+# Identifies the deployed code, part of the ETag of the pages (see store.conditional).
+# Heroku sets HEROKU_SLUG_COMMIT when the dyno metadata feature is enabled
+RELEASE_VERSION = os.environ.get(
+    "RELEASE_VERSION", os.environ.get("HEROKU_SLUG_COMMIT", "")
+)
+
 WSGI_APPLICATION = "PeanutButter.wsgi.application"
 
 
@@ -139,6 +204,7 @@ if not PRODUCTION:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+            "CONN_MAX_AGE": int(os.environ.get("DATABASE_CONN_MAX_AGE", 0)),
         }
     }
 else:
@@ -152,6 +218,92 @@ else:
             "HOST": os.environ.get("DATABASE_HOST"),
         }
     }
+    # Heroku's DATABASE_URL takes precedence over the variables above
+    if "DATABASE_URL" in os.environ:
+        DATABASES["default"] = dj_database_url.config(ssl_require=True)
+
+    # Persistent connections, checked before their first use in each request
+    # (PeanutButter.postgresql). DATABASE_POOL_SIZE enables the in-process pool instead,
+    # meant for the ASGI entry point, where sync views run on different threads
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 0))
+    DATABASES["default"].update(
+        {
+            "ENGINE": "PeanutButter.postgresql",
+            "CONN_MAX_AGE": (
+                0
+                if DATABASE_POOL_SIZE
+                else int(os.environ.get("DATABASE_CONN_MAX_AGE", 600))
+            ),
+            "CONN_HEALTH_CHECKS": (
+                os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "True") == "True"
+            ),
+            "POOL_SIZE": DATABASE_POOL_SIZE,
+            "POOL_TIMEOUT": int(os.environ.get("DATABASE_POOL_TIMEOUT", 30)),
+        }
+    )
+
+# Read replicas
+# Reads of the views below (by url name) and of the code wrapped in
+# PeanutButter.replicas.replica_reads go to a replica; everything else uses "default".
+# Locally a second connection to the same SQLite file stands in for the replica
+
+if not PRODUCTION:
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+else:
+    for index, host in enumerate(
+        filter(None, os.environ.get("DATABASE_REPLICA_HOSTS", "").split(","))
+    ):
+        DATABASES[f"replica_{index}"] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["PeanutButter.replicas.ReplicaRouter"]
+REPLICA_READ_VIEWS = ["store", "search", "view_product", "user_page", "view_order"]
+# Clients that wrote (cart, checkout, login) read from "default" for this long, so they
+# always see their own writes despite the replication lag
+REPLICA_STICKY_SECONDS = 10
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# Defaults to a per-process local memory cache, a stand-in for a shared cache server
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "helgas"),
+    }
+}
+# A per-process cache isn't seen by the other gunicorn workers: state they must share
+# is only kept in the cache when the backend is shared (e.g. memcached or redis)
+CACHE_IS_SHARED = not CACHES["default"]["BACKEND"].endswith(".LocMemCache")
+
+# Sessions are read from the cache and only hit the database on a cache miss or a write.
+# This needs a shared cache: set CACHE_BACKEND (and CACHE_LOCATION) to e.g. memcached or
+# redis. On the default per-process cache the db engine is used, since a logout on one
+# worker would leave the session alive in the others' cache
+SESSION_ENGINE = (
+    "django.contrib.sessions.backends.cached_db"
+    if CACHE_IS_SHARED
+    else "django.contrib.sessions.backends.db"
+)
+
+# Shipping quotes (store.shipping_quotes) are cached per CEP and service. Viewing the
+# cart fetches, in background threads, the quotes of the customer's main address and
+# most recent ones
+SHIPPING_QUOTE_TIMEOUT = int(os.environ.get("SHIPPING_QUOTE_TIMEOUT", 6 * 60 * 60))
+SHIPPING_QUOTE_PREFETCH_ADDRESSES = 3
+SHIPPING_QUOTE_PREFETCH_WORKERS = int(
+    os.environ.get("SHIPPING_QUOTE_PREFETCH_WORKERS", 2)
+)
+# prefetches queued or running per process; the ones past it are dropped
+SHIPPING_QUOTE_PREFETCH_MAX_PENDING = int(
+    os.environ.get("SHIPPING_QUOTE_PREFETCH_MAX_PENDING", 12)
+)
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -174,6 +326,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (PeanutButter.hashers)
+# New passwords are hashed with PASSWORD_HASHER ("pbkdf2" or "argon2", which needs
+# argon2-cffi) at the costs below; the other hashers only verify existing passwords.
+# Passwords hashed with another hasher or cost are rehashed on the next login.
+# `python manage.py benchmark_password_hashers` measures the latency of each cost
+
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 180000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 512))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 2))
+
+_PASSWORD_HASHERS = {
+    "pbkdf2": "PeanutButter.hashers.PBKDF2PasswordHasher",
+    "argon2": "PeanutButter.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS.pop(PASSWORD_HASHER),
+    *_PASSWORD_HASHERS.values(),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
 AUTHENTICATION_BACKENDS = (
     "django.contrib.auth.backends.ModelBackend",
     "allauth.account.auth_backends.AuthenticationBackend",
@@ -181,6 +356,19 @@ AUTHENTICATION_BACKENDS = (
 
 AUTH_USER_MODEL = "store.CustomUser"
 
+# Login throttling (store.login_throttle): failed attempts per email and per client IP
+# in a sliding window, rejected before any password is hashed. Emails without an account
+# are remembered so repeated attempts with them skip the database and the hashing
+LOGIN_THROTTLE_WINDOW = int(os.environ.get("LOGIN_THROTTLE_WINDOW", 300))
+LOGIN_THROTTLE_EMAIL_LIMIT = int(os.environ.get("LOGIN_THROTTLE_EMAIL_LIMIT", 5))
+LOGIN_THROTTLE_IP_LIMIT = int(os.environ.get("LOGIN_THROTTLE_IP_LIMIT", 30))
+LOGIN_UNKNOWN_EMAIL_TIMEOUT = int(os.environ.get("LOGIN_UNKNOWN_EMAIL_TIMEOUT", 600))
+# Only on a shared cache: per process, a new account would still be an unknown email on
+# the other workers. The limits are always enforced (per process, they are less strict)
+LOGIN_UNKNOWN_EMAIL_CACHE = CACHE_IS_SHARED
+# Behind the Heroku router the client IP is the last entry of X-Forwarded-For
+CLIENT_IP_FROM_X_FORWARDED_FOR = bool(PRODUCTION)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -220,15 +408,41 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 
 STATIC_URL = "/static/"
 
+# Minified, hashed and precompressed on `collectstatic` (see BundledStaticFilesStorage)
+STATICFILES_STORAGE = "PeanutButter.storage_backends.BundledStaticFilesStorage"
+
+# Classic scripts concatenated into a single file, in order. ES modules (utils.js) are
+# kept apart so that their imports keep working
+STATIC_BUNDLES = {
+    "js/base.bundle.js": ["js/cart.js", "js/navBarDropDownActions.js"],
+    "js/product.bundle.js": ["js/slider.js", "js/jquery.zoom.js"],
+}
+
 
 if not PRODUCTION:
     MEDIA_URL = "/images/"
 else:
     MEDIA_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/media/"
-    DEFAULT_FILE_STORAGE = "PeanutButter.storage_backends.MediaStorage"
+    DEFAULT_FILE_STORAGE = "PeanutButter.media_storage.MediaStorage"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "static/images")
 
+# Local CEP index generated by `python manage.py import_ceps <csv>`
+CEP_INDEX_PATH = os.environ.get(
+    "CEP_INDEX_PATH", os.path.join(BASE_DIR, "cep_index.bin")
+)
+
+# Carrier tracking API polled by `python manage.py poll_shipments`
+TRACKING_BACKEND = os.environ.get(
+    "TRACKING_BACKEND",
+    "store.carriers.CorreiosTrackingBackend"
+    if PRODUCTION
+    else "store.carriers.StubTrackingBackend",
+)
+TRACKING_STUB_LATENCY = float(os.environ.get("TRACKING_STUB_LATENCY", 0.2))
+CORREIOS_SRO_USER = os.environ.get("CORREIOS_SRO_USER", "")
+CORREIOS_SRO_PASSWORD = os.environ.get("CORREIOS_SRO_PASSWORD", "")
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 
 EMAIL_HOST = "smtp.gmail.com"
@@ -260,5 +474,8 @@ SITE_ID = 1
 
 LOGIN_REDIRECT_URL = "/"
 
-
-django_heroku.settings(locals())
+# Heroku CI runner, set by django_heroku.settings() before. That call is gone because
+# importing django_heroku (and django.test with it) slowed down every worker boot and
+# manage.py command, and everything else it configured is set explicitly above
+if "CI" in os.environ:
+    TEST_RUNNER = "django_heroku.HerokuDiscoverRunner"
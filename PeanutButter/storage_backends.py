@@ -1,6 +1,128 @@
-from storages.backends.s3boto3 import S3Boto3Storage
+import os
+import re
 
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
 
-class MediaStorage(S3Boto3Storage):
-    location = "media"
-    file_overwrite = True
+# strings are matched first so that their content is never touched
+CSS_TOKENS = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*!.*?\*/)|/\*.*?\*/"""
+    r"""|\s*([{};,])\s*|(:)\s+|(\s+)""",
+    re.S,
+)
+# only whole-line comments and indentation are removed: inline "//" may belong to a
+# regex literal and newlines are kept because of the automatic semicolon insertion
+JS_TOKENS = re.compile(
+    r"""(`(?:\\.|[^`\\])*`|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|^[ \t]*/\*!.*?\*/)"""
+    r"""|^[ \t]*(?://[^\n]*|/\*.*?\*/[ \t]*)(?:\n|$)|\n(?:[ \t]*\n)+|^[ \t]+|[ \t]+$""",
+    re.S | re.M,
+)
+
+
+def _minify_css_token(match):
+    string, license_comment, punctuation, colon, space = match.groups()
+    if string or license_comment:
+        return string or license_comment + "\n"
+    if punctuation or colon:
+        return punctuation or colon
+    return " " if space else ""
+
+
+def minify_css(content):
+    return CSS_TOKENS.sub(_minify_css_token, content).strip()
+
+
+def minify_js(content):
+    content = content.replace("\r\n", "\n")
+    return JS_TOKENS.sub(
+        lambda match: match.group(1) or ("\n" if match.group(0)[:1] == "\n" else ""),
+        content,
+    ).strip()
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def get_minifier(name):
+    if name.endswith((".min.css", ".min.js")):
+        return None
+    return MINIFIERS.get(name[name.rfind(".") :])
+
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Classe que, no `collectstatic`, minifica os CSS e JS, concatena os bundles de
+    `settings.STATIC_BUNDLES` e so entao gera os nomes com hash (manifest) e as versoes
+    comprimidas (gzip e, com o pacote `brotli` instalado, brotli) do whitenoise.
+
+    Como todo arquivo referenciado pelos templates passa a ter hash no nome, o whitenoise
+    os serve com cache imutavel.
+    """
+
+    # rewrite relative ES module imports (ex.: `from "./utils.js"`) to the hashed names
+    patterns = CompressedManifestStaticFilesStorage.patterns + (
+        ("*.js", ((r"""(from\s*["'](\.{1,2}/[^"']*?)["'])""", 'from "%s"'),)),
+    )
+
+    @property
+    def bundles(self):
+        return getattr(settings, "STATIC_BUNDLES", {})
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            self.minify_files(paths)
+            self.build_bundles(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _overwrite(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content.encode()))
+
+    def _read(self, paths, name):
+        storage, path = paths[name]
+        with storage.open(path) as file:
+            return file.read().decode()
+
+    def minify_files(self, paths):
+        """
+        Metodo que minifica os CSS e JS do projeto (STATICFILES_DIRS). Os arquivos
+        minificados substituem as copias no STATIC_ROOT e passam a ser a origem do hash.
+
+        Args:
+            paths (dict): Arquivos coletados no formato {nome: (storage, caminho)}.
+        """
+        project_dirs = {
+            os.path.abspath(path if isinstance(path, str) else path[1])
+            for path in settings.STATICFILES_DIRS
+        }
+        for name, (storage, _) in list(paths.items()):
+            minify = get_minifier(name)
+            # the apps' files (admin, allauth) are shipped as they are
+            if minify is None or os.path.abspath(storage.location) not in project_dirs:
+                continue
+            self._overwrite(name, minify(self._read(paths, name)))
+            paths[name] = (self, name)
+
+    def build_bundles(self, paths):
+        """
+        Metodo que concatena (na ordem definida) os arquivos de cada bundle.
+
+        Args:
+            paths (dict): Arquivos coletados no formato {nome: (storage, caminho)}.
+        """
+        for bundle, sources in self.bundles.items():
+            missing = [source for source in sources if source not in paths]
+            if missing:
+                raise ValueError(
+                    f"Bundle '{bundle}': arquivos nao encontrados: {', '.join(missing)}"
+                )
+            # ";" guards against sources that rely on the automatic semicolon insertion
+            separator = "\n;\n" if bundle.endswith(".js") else "\n"
+            self._overwrite(
+                bundle,
+                separator.join(self._read(paths, source) for source in sources),
+            )
+            paths[bundle] = (self, bundle)
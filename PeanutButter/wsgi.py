@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "PeanutButter.settings")
 
 application = get_wsgi_application()
+
+# compiles the store templates now instead of on the first request of each page
+from store.template_warmup import warm_templates  # noqa: E402 (needs the app registry)
+
+warm_templates()
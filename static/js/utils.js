@@ -13,7 +13,7 @@ export function getZipCodeError(errorCode, errorMsg) {
 
 
 export async function getZipCodeInfos(value) {
-    const response = await fetch("https://viacep.com.br/ws/" + value + "/json/");
+    const response = await fetch("/get_zip_code_infos/" + value + "/");
     return response.json();
 }
 
@@ -1,17 +1,20 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import ugettext_lazy as _
 
+from .choices import ORDER_STATUSES
 from .models import (
     Customer,
     CustomUser,
     Order,
     OrderItem,
+    OrderStatusChange,
     Payment,
     Product,
     ShippingAddress,
     ShippingService,
 )
+from .order_status import get_source_statuses, transition_orders
 
 
 @admin.register(CustomUser)
@@ -43,8 +46,49 @@ class CustomUserAdmin(UserAdmin):
     ordering = ("email",)
 
 
+def make_transition_action(to_status, label):
+    """Funcao que cria a acao que move os pedidos selecionados para um status"""
+
+    def action(modeladmin, request, queryset):
+        moved, skipped = transition_orders(queryset, to_status, changed_by=request.user)
+        modeladmin.message_user(request, f"{moved} pedido(s) movido(s) para '{label}'.")
+        if skipped:
+            modeladmin.message_user(
+                request,
+                f"{skipped} pedido(s) ignorado(s): nao podem ir para '{label}'.",
+                messages.WARNING,
+            )
+
+    action.__name__ = f"transition_to_{to_status}"
+    action.short_description = f"Mover para: {label}"
+    return action
+
+
+class OrderStatusChangeInline(admin.TabularInline):
+    model = OrderStatusChange
+    fields = ("from_status", "to_status", "changed_at", "changed_by")
+    readonly_fields = fields
+    ordering = ("-changed_at",)
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "customer", "status", "requested_at", "completed_at")
+    list_filter = ("status",)
+    inlines = (OrderStatusChangeInline,)
+    actions = [
+        make_transition_action(status, label)
+        for status, label in ORDER_STATUSES
+        if get_source_statuses(status)
+    ]
+
+
 admin.site.register(Customer)
-admin.site.register(Order)
 admin.site.register(OrderItem)
 admin.site.register(Payment)
 admin.site.register(Product)
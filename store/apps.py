@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class StoreConfig(AppConfig):
     name = "store"
+
+    def ready(self):
+        from allauth.account.signals import user_logged_in
+
+        from .customers import link_customer_on_login
+
+        user_logged_in.connect(
+            link_customer_on_login, dispatch_uid="link_customer_on_login"
+        )
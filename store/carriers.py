@@ -0,0 +1,151 @@
+"""
+Backends de rastreio das transportadoras, usados pelo poller (store.shipment_tracking).
+
+Um backend recebe uma lista de codigos de rastreio (uma requisicao por lista, de no
+maximo `max_batch_size` codigos) e retorna os eventos de cada codigo. O backend eh
+escolhido por `settings.TRACKING_BACKEND`.
+"""
+
+from datetime import datetime, timedelta
+import time
+import zlib
+from xml.sax.saxutils import escape
+
+import pytz
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CORREIOS_SRO_URL = "https://webservice.correios.com.br/service/rastro"
+CORREIOS_TIMEZONE = pytz.timezone("America/Sao_Paulo")
+# event types that, with status 00 or 01, mean the object was delivered
+CORREIOS_DELIVERED_TYPES = ("BDE", "BDI", "BDR")
+
+
+def get_tracking_backend():
+    return import_string(settings.TRACKING_BACKEND)()
+
+
+def make_event(status, description, occurred_at, location="", delivered=False):
+    return {
+        "status": status,
+        "description": description,
+        "location": location,
+        "occurred_at": occurred_at,
+        "delivered": delivered,
+    }
+
+
+class CorreiosTrackingBackend:
+    """
+    Classe que consulta o SRO (web service de rastreio dos Correios), que aceita varios
+    objetos por requisicao (`buscaEventosLista`).
+    """
+
+    max_batch_size = 50
+    timeout = 20
+
+    def __init__(self):
+        self.user = settings.CORREIOS_SRO_USER
+        self.password = settings.CORREIOS_SRO_PASSWORD
+
+    def get_envelope(self, codes):
+        objects = "".join(f"<objetos>{escape(code)}</objetos>" for code in codes)
+        return (
+            '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"'
+            ' xmlns:res="http://resource.webservice.correios.com.br/">'
+            "<soapenv:Header/><soapenv:Body><res:buscaEventosLista>"
+            f"<usuario>{escape(self.user)}</usuario><senha>{escape(self.password)}</senha>"
+            "<tipo>L</tipo><resultado>T</resultado><lingua>101</lingua>"
+            f"{objects}</res:buscaEventosLista></soapenv:Body></soapenv:Envelope>"
+        )
+
+    def track(self, codes):
+        """
+        Metodo que obtem os eventos de uma lista de codigos de rastreio.
+
+        Args:
+            codes (list): Os codigos.
+
+        Returns:
+            events (dict): Os eventos (dicts de `make_event`) de cada codigo. Codigos sem
+                eventos nao aparecem.
+        """
+        # imported on first use, not on every worker boot (see report_import_times)
+        from defusedxml import ElementTree
+        import requests
+
+        response = requests.post(
+            CORREIOS_SRO_URL,
+            data=self.get_envelope(codes).encode("utf-8"),
+            headers={"Content-Type": "text/xml; charset=utf-8"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        events = {}
+        for tracked_object in ElementTree.fromstring(response.content).iter("objeto"):
+            code = tracked_object.findtext("numero")
+            for event in tracked_object.iter("evento"):
+                event_type = event.findtext("tipo", "")
+                event_status = event.findtext("status", "")
+                occurred_at = CORREIOS_TIMEZONE.localize(
+                    datetime.strptime(
+                        f"{event.findtext('data')} {event.findtext('hora')}",
+                        "%d/%m/%Y %H:%M",
+                    )
+                )
+                city, uf = event.findtext("cidade", ""), event.findtext("uf", "")
+                events.setdefault(code, []).append(
+                    make_event(
+                        status=f"{event_type}{event_status}",
+                        description=event.findtext("descricao", ""),
+                        occurred_at=occurred_at,
+                        location=f"{city} / {uf}" if city else "",
+                        delivered=(
+                            event_type in CORREIOS_DELIVERED_TYPES
+                            and event_status in ("00", "01")
+                        ),
+                    )
+                )
+        return events
+
+
+class StubTrackingBackend:
+    """
+    Classe que simula a API de rastreio, para desenvolvimento e benchmarks. Cada codigo
+    tem um andamento fixo (derivado do proprio codigo) e cada requisicao demora
+    `settings.TRACKING_STUB_LATENCY` segundos, como uma ida e volta pela rede.
+    """
+
+    max_batch_size = 50
+    EVENTS = (
+        ("PO01", "Objeto postado"),
+        ("RO01", "Objeto em trânsito - por favor aguarde"),
+        ("OEC01", "Objeto saiu para entrega ao destinatário"),
+        ("BDE01", "Objeto entregue ao destinatário"),
+    )
+
+    def __init__(self, latency=None):
+        self.latency = settings.TRACKING_STUB_LATENCY if latency is None else latency
+
+    def track(self, codes):
+        time.sleep(self.latency)
+        events = {}
+        for code in codes:
+            seed = zlib.crc32(code.encode())
+            posted_at = datetime(2020, 1, 1, 8, tzinfo=pytz.utc) + timedelta(
+                hours=seed % 8760
+            )
+            n_events = 1 + seed % len(self.EVENTS)
+            events[code] = [
+                make_event(
+                    status=status,
+                    description=description,
+                    occurred_at=posted_at + timedelta(hours=18 * index),
+                    location="FLORIANOPOLIS / SC",
+                    delivered=index == len(self.EVENTS) - 1,
+                )
+                for index, (status, description) in enumerate(self.EVENTS[:n_events])
+            ]
+        return events
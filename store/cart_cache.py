@@ -0,0 +1,27 @@
+"""
+Versao do carrinho usada no cache do fragmento do carrinho da navbar.
+
+O fragmento (`store/navbar.html`) fica em cache sob o id do pedido e
+`Order.cart_version`, uma coluna incrementada no banco, na mesma transacao, a cada
+mudanca nos itens do pedido ou nos produtos de um carrinho (preco, nome e imagem
+aparecem no fragmento). Um fragmento desatualizado nunca mais eh lido e expira sozinho.
+A versao vem do pedido que `get_context` ja carrega: navegar com o carrinho inalterado
+custa uma leitura do cache e nenhuma consulta a mais, e todos os processos veem a mesma
+versao.
+
+`save()`, `delete()` e as alteracoes em lote (`update()`/`delete()` de
+`OrderItem.objects`) incrementam a versao; quem criar itens com `bulk_create` deve
+chamar `bump_cart_versions`.
+"""
+
+from django.db.models import F
+
+
+def bump_cart_versions(orders):
+    """
+    Funcao que invalida o carrinho em cache de pedidos.
+
+    Args:
+        orders (QuerySet): Os pedidos.
+    """
+    orders.update(cart_version=F("cart_version") + 1)
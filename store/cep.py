@@ -0,0 +1,148 @@
+"""
+Indice local de CEPs.
+
+O indice eh um arquivo binario gerado pelo comando `import_ceps` e lido via mmap, de forma que
+as consultas nao dependem do banco de dados nem de servicos externos (ViaCEP). Formato:
+
+    cabecalho | CEPs ordenados (uint32) | offsets dos registros (uint32) | registros
+
+Cada registro eh o texto "logradouro<US>bairro<US>cidade<US>uf" codificado em UTF-8. A busca
+eh binaria sobre os CEPs, logo O(log n).
+"""
+
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+import struct
+
+from django.conf import settings
+
+from .normalizers import normalize_cep
+
+MAGIC = b"HCEPIDX1"
+HEADER = struct.Struct("=8sI")
+SEPARATOR = "\x1f"  # ASCII unit separator
+
+_cep_index = None
+
+
+class CepIndex:
+    """Classe que representa o indice de CEPs mapeado em memoria"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.mtime = os.fstat(file.fileno()).st_mtime
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} não é um índice de CEPs válido")
+
+        keys_start = HEADER.size
+        offsets_start = keys_start + 4 * self._count
+        self._records_start = offsets_start + 4 * (self._count + 1)
+
+        view = memoryview(self._mmap)
+        self._keys = view[keys_start:offsets_start].cast("I")
+        self._offsets = view[offsets_start : self._records_start].cast("I")
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, zip_code):
+        """
+        Metodo que obtem o endereco de um CEP.
+
+        Args:
+            zip_code (str): O CEP, com ou sem mascara.
+
+        Returns:
+            zip_code_infos (dict | None): Dicionario com o logradouro, bairro, cidade e estado
+                do CEP ou None se o CEP nao existir no indice.
+        """
+        zip_code = normalize_cep(str(zip_code))
+        if len(zip_code) != 8:
+            return None
+
+        key = int(zip_code)
+        position = bisect_left(self._keys, key)
+        if position == self._count or self._keys[position] != key:
+            return None
+
+        start = self._records_start + self._offsets[position]
+        end = self._records_start + self._offsets[position + 1]
+        address, neighborhood, city, uf = (
+            self._mmap[start:end].decode("utf-8").split(SEPARATOR)
+        )
+        return {
+            "zip_code": zip_code,
+            "address": address,
+            "neighborhood": neighborhood,
+            "city": city,
+            "uf": uf,
+        }
+
+
+def write_cep_index(records, path):
+    """
+    Funcao que gera o arquivo do indice de CEPs.
+
+    O arquivo eh escrito em um arquivo temporario e depois movido para `path`, logo os
+    processos que ja mapearam o indice antigo continuam lendo-o ate recarregarem.
+
+    Args:
+        records (iterable): Tuplas (cep, logradouro, bairro, cidade, uf). Em caso de CEPs
+            repetidos, prevalece o ultimo.
+        path (str): Caminho do arquivo do indice.
+
+    Returns:
+        count (int): O numero de CEPs do indice.
+    """
+    by_zip_code = {}
+    for zip_code, address, neighborhood, city, uf in records:
+        fields = (address, neighborhood, city, uf)
+        by_zip_code[int(zip_code)] = SEPARATOR.join(
+            field.replace(SEPARATOR, " ").strip() for field in fields
+        ).encode("utf-8")
+
+    keys = array("I", sorted(by_zip_code))
+    offsets = array("I", [0])
+    for key in keys:
+        offsets.append(offsets[-1] + len(by_zip_code[key]))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(keys)))
+        keys.tofile(file)
+        offsets.tofile(file)
+        for key in keys:
+            file.write(by_zip_code[key])
+    os.replace(tmp_path, path)
+    return len(keys)
+
+
+def get_cep_index():
+    """
+    Funcao que obtem o indice de CEPs do processo, recarregando-o se o arquivo foi regerado.
+
+    Returns:
+        cep_index (CepIndex | None): O indice ou None se o comando `import_ceps` ainda nao
+            foi executado.
+    """
+    global _cep_index  # pylint: disable=global-statement
+
+    path = settings.CEP_INDEX_PATH
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    if _cep_index is None or _cep_index.path != path or _cep_index.mtime != mtime:
+        _cep_index = CepIndex(path)
+    return _cep_index
@@ -40,6 +40,16 @@ ORDER_STATUSES = [
     ("shipped", "Pedido enviado"),
 ]
 
+# valid moves of the order status state machine (see store.order_status); a cart
+# ("analysing") only becomes an order at checkout, with its payment and shipping
+ORDER_STATUS_TRANSITIONS = {
+    "requested": ("payed",),
+    "payed": ("preparing",),
+    "preparing": ("shipped",),
+}
+# reaching these statuses stamps Order.completed_at
+ORDER_FINAL_STATUSES = ("shipped",)
+
 SEDEX = "04014"
 PAC = "04510"
 
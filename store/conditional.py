@@ -0,0 +1,168 @@
+"""
+Respostas condicionais (ETag) das paginas de produto e de pedido.
+
+A ETag de cada pagina junta as versoes de tudo o que ela mostra: o produto ou o pedido,
+o usuario, o carrinho da navbar e a versao do deploy (templates, arquivos estaticos e
+codigo). Quando o navegador envia a mesma ETag, a view responde 304 sem rodar
+`get_context` nem renderizar o template.
+
+As versoes saem do banco, e nao do cache de cada processo: um worker que nao viu a
+mudanca do carrinho responderia 304 com a navbar desatualizada. A de um carrinho (ou dos
+itens de um pedido) eh o numero de itens, a soma das quantidades, o ultimo item e a
+ultima alteracao dos seus produtos (preco, nome e imagem), lidos em uma unica consulta.
+
+Last-Modified nao eh usado: uma mudanca no carrinho nao muda nenhuma data, e um cliente
+que enviasse apenas If-Modified-Since receberia um 304 com a navbar desatualizada.
+"""
+
+from functools import lru_cache
+import hashlib
+import os
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+
+from .models import Customer, Order, Product, ShipmentEvent
+from .template_warmup import get_template_names, get_templates_dir
+
+ORDER_ADDRESS_FIELDS = [
+    f"shipping_address__{field}"
+    for field in (
+        "address",
+        "number",
+        "complement",
+        "reference",
+        "neighborhood",
+        "city",
+        "uf",
+        "zip_code",
+    )
+]
+
+ITEMS_VERSION = {
+    "n_items": Count("orderitem"),
+    "quantity": Sum("orderitem__quantity"),
+    "last_item_id": Max("orderitem__id"),
+    "products_updated_at": Max("orderitem__product__updated_at"),
+}
+
+
+def _get_release_version():
+    digest = hashlib.sha256(settings.RELEASE_VERSION.encode())
+    templates_dir = get_templates_dir()
+    for name in get_template_names():
+        digest.update(name.encode())
+        with open(os.path.join(templates_dir, name), "rb") as template:
+            digest.update(template.read())
+    # the hashed names of the static files the pages link to
+    read_manifest = getattr(staticfiles_storage, "read_manifest", None)
+    digest.update(((read_manifest and read_manifest()) or "").encode())
+    return digest.hexdigest()
+
+
+_get_cached_release_version = lru_cache(maxsize=None)(_get_release_version)
+
+
+def get_release_version():
+    """
+    Funcao que obtem a versao do deploy. Fora do DEBUG eh calculada uma vez por
+    processo; em desenvolvimento os templates mudam sem reiniciar o servidor.
+    """
+    if settings.DEBUG:
+        return _get_release_version()
+    return _get_cached_release_version()
+
+
+def get_cart_version(request):
+    """
+    Funcao que obtem a versao do carrinho (pedido em analise) do visitante sem cria-lo.
+
+    Returns:
+        version (tuple): Tupla (id do pedido, versao dos itens) ou None sem carrinho.
+    """
+    if request.user.is_authenticated:
+        try:
+            orders = Order.objects.filter(customer=request.user.customer)
+        except Customer.DoesNotExist:
+            return None
+    else:
+        device = request.COOKIES.get("device")
+        if not device:
+            return None
+        orders = Order.objects.filter(customer__device=device)
+    return (
+        orders.filter(status="analysing")
+        .annotate(**ITEMS_VERSION)
+        .values_list("id", *ITEMS_VERSION)
+        .first()
+    )
+
+
+def get_page_etag(request, *versions):
+    """
+    Funcao que calcula a ETag de uma pagina da loja a partir das versoes do que ela
+    mostra alem da navbar. Sem carrinho (a view o cria) ou com mensagens a exibir, a
+    pagina eh sempre renderizada.
+
+    Args:
+        versions: Versoes do conteudo da pagina.
+
+    Returns:
+        etag (str): A ETag (fraca: o token CSRF muda a cada renderizacao) ou None.
+    """
+    if messages.get_messages(request):
+        return None
+    cart_version = get_cart_version(request)
+    if cart_version is None:
+        return None
+
+    parts = [
+        get_release_version(),
+        request.user.pk,
+        str(request.user),  # shown in the navbar
+        cart_version,
+        *versions,
+    ]
+    return 'W/"{}"'.format(hashlib.sha256(repr(parts).encode()).hexdigest()[:32])
+
+
+def get_product_etag(request, product_id):
+    updated_at = (
+        Product.objects.filter(pk=product_id)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    # the navbar cart has a version of its own (get_cart_version)
+    return get_page_etag(request, "product", product_id, updated_at)
+
+
+def get_order_etag(request, order_id):
+    try:
+        customer = request.user.customer
+    except Customer.DoesNotExist:
+        return None
+    last_event = (
+        ShipmentEvent.objects.filter(shipping_service=OuterRef("shipping_service"))
+        .order_by("-id")
+        .values("id")
+    )
+    version = (
+        Order.objects.filter(customer=customer, id=order_id)
+        # a subquery: joined with the items, the events would multiply their sums
+        .annotate(last_event_id=Subquery(last_event[:1]), **ITEMS_VERSION)
+        .values_list(
+            "status",
+            "completed_at",
+            "shipping_service___tracking_code",
+            "shipping_service__tracking_updated_at",
+            "last_event_id",
+            *ORDER_ADDRESS_FIELDS,
+            *ITEMS_VERSION,
+        )
+        .first()
+    )
+    if version is None:  # not found page
+        return None
+    return get_page_etag(request, "order", version)
@@ -0,0 +1,85 @@
+"""
+Vinculo entre o usuario e o seu cliente (`Customer`).
+
+Quem compra sem login eh um cliente identificado pelo cookie `device`. Os usuarios do
+cadastro da loja recebem o cliente no registro; os do login social, no primeiro login
+(sinal `user_logged_in` do allauth, conectado em `StoreConfig.ready`). Em ambos os casos o
+carrinho do dispositivo passa para o usuario.
+"""
+
+from django.db import transaction
+
+from .models import Customer, Order
+
+
+def merge_cart(source, target):
+    """
+    Funcao que move os itens do carrinho (pedido em analise) de um cliente para o de
+    outro, somando as quantidades dos produtos que ja estavam no carrinho de destino.
+
+    Args:
+        source (Customer): O cliente de origem (o do dispositivo).
+        target (Customer): O cliente de destino (o do usuario).
+    """
+    source_order = (
+        Order.objects.select_for_update()
+        .filter(customer=source, status="analysing")
+        .first()
+    )
+    if source_order is None:
+        return
+    target_order, _ = Order.objects.select_for_update().get_or_create(
+        customer=target, status="analysing"
+    )
+    target_items = {item.product_id: item for item in target_order.orderitem_set.all()}
+    # saved and deleted one by one: both carts in the cache are invalidated (cart_cache)
+    for item in source_order.orderitem_set.all():
+        if item.product_id in target_items:
+            target_item = target_items[item.product_id]
+            target_item.quantity += item.quantity
+            target_item.save(update_fields=["quantity"])
+            item.delete()
+        else:
+            item.order = target_order
+            item.save(update_fields=["order"])
+    source_order.delete()
+
+
+def provision_customer(user, device=None):
+    """
+    Funcao que obtem o cliente do usuario, criando-o se necessario (login social).
+
+    Args:
+        user (CustomUser): O usuario.
+        device (str): O cookie `device` do navegador, se houver.
+
+    Returns:
+        customer (Customer): O cliente do usuario.
+    """
+    with transaction.atomic():
+        device_customer = None
+        if device:
+            device_customer = (
+                Customer.objects.select_for_update()
+                .filter(device=device, user__isnull=True)
+                .first()
+            )
+        customer = Customer.objects.filter(user=user).first()
+
+        if customer is None and device_customer is not None:
+            # the device's customer (and cart) becomes the user's. Without the device,
+            # it isn't found again by the cookie once the user logs out
+            device_customer.user = user
+            device_customer.device = None
+            device_customer.save(update_fields=["user", "device"])
+            return device_customer
+        if customer is None:
+            customer, _ = Customer.objects.get_or_create(user=user)
+        elif device_customer is not None:
+            merge_cart(device_customer, customer)
+    return customer
+
+
+def link_customer_on_login(request, user, **kwargs):
+    """Funcao que recebe o sinal de login do allauth e vincula o cliente do usuario"""
+    provision_customer(user, request.COOKIES.get("device"))
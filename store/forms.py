@@ -1,4 +1,5 @@
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 
 from django import forms
 from django.contrib.auth import authenticate, password_validation
@@ -17,9 +18,20 @@ from crispy_forms.layout import Layout, Submit, Row, Column
 from crispy_forms.bootstrap import FormActions
 from dateutil.relativedelta import relativedelta
 
+from . import login_throttle
+from .cep import get_cep_index
 from .choices import ADDRESS_TYPE_CHOICES, STATES
-from .helpers import exclude_mask_chars, get_installment_options
+from .helpers import get_installment_options
 from .models import Customer, CustomUser, Payment, ShippingAddress
+from .normalizers import (
+    cep_is_valid,
+    format_phone,
+    normalize_cep,
+    normalize_cpf,
+    normalize_phone,
+    phone_is_valid,
+)
+from .search import tokenize
 from .validators import cpf_is_valid
 
 
@@ -81,12 +93,16 @@ class CustomUserCreationForm(UserCreationForm):
         return username
 
 
+@lru_cache(maxsize=None)
 def get_user_creation_form_layout(page):
     """
     Funcao que obtem o layout do formulario de criacao do usuario.
 
     Args:
         page(str): String que indica a página onde o formulario estará.
+
+    O layout eh construido uma unica vez por variante de pagina e compartilhado entre
+    as instancias do formulario.
     """
     if page:
         return Layout(
@@ -173,9 +189,11 @@ class CustomerCreationForm(forms.ModelForm):
 
     def clean_cpf(self):
         """Funcao que valida o CPF de um usuario"""
-        cpf = exclude_mask_chars(self.cleaned_data["cpf"])
-        if cpf and Customer.objects.filter(cpf=cpf).exists():
-            customer = Customer.objects.get(cpf=cpf)
+        cpf = normalize_cpf(self.cleaned_data["cpf"])
+        customer = (
+            Customer.objects.filter(cpf=cpf).only("created_at").first() if cpf else None
+        )
+        if customer is not None:
             raise ValidationError(
                 _(
                     "O CPF %(cpf)s já está cadastrado no sistema! "
@@ -224,10 +242,11 @@ class CustomerCreationForm(forms.ModelForm):
             )
         return birth_date
 
-    def clean_phone(self):  # TODO: validate phone
-        return exclude_mask_chars(self.cleaned_data["phone"])
+    def clean_phone(self):
+        return clean_phone_field(self.cleaned_data["phone"])
 
 
+@lru_cache(maxsize=None)
 def get_customer_creation_form_layout(page):
     """
     Funcao que obtem o layout do formulario de criacao do cliente.
@@ -259,6 +278,17 @@ def get_customer_creation_form_layout(page):
     )
 
 
+def clean_phone_field(phone):
+    """Funcao que valida e remove a mascara do telefone de um cliente"""
+    if not phone_is_valid(phone):
+        raise ValidationError(
+            _("O telefone %(phone)s é inválido"),
+            code="invalid",
+            params={"phone": phone},
+        )
+    return normalize_phone(phone)
+
+
 class CustomAuthenticationForm(AuthenticationForm):
     """Classe para o formulario de autenticacao do usuario"""
 
@@ -290,6 +320,9 @@ class CustomAuthenticationForm(AuthenticationForm):
     error_messages = {
         "invalid_login": _("Por favor, forneça um e-mail e senha corretos."),
         "inactive": _("Essa conta está inativa."),
+        "too_many_attempts": _(
+            "Muitas tentativas de login. Tente novamente em alguns minutos."
+        ),
     }
 
     def clean(self):
@@ -297,23 +330,37 @@ class CustomAuthenticationForm(AuthenticationForm):
         password = self.cleaned_data.get("password")
 
         if email is not None and password:
+            # both checks only read the cache: no query and no password hashing
+            if login_throttle.is_throttled(self.request, email):
+                raise forms.ValidationError(
+                    self.error_messages["too_many_attempts"],
+                    code="too_many_attempts",
+                )
+            if login_throttle.is_unknown_email(email):
+                self.reject_login(email)
+
             self.user_cache = authenticate(self.request, email=email, password=password)
             if self.user_cache is None:
-                try:
-                    _user = CustomUser.objects.get(email=email)
-                except CustomUser.DoesNotExist:
-                    _user = None
-
-                if _user is not None and _user.check_password(password):
+                _user = CustomUser.objects.filter(email__iexact=email).first()
+                if _user is None:
+                    login_throttle.remember_unknown_email(email)
+                # the backends reject inactive users even with the right password; for
+                # active ones the password was wrong and there is no need to hash it again
+                elif not _user.is_active and _user.check_password(password):
                     self.confirm_login_allowed(_user)
-                else:
-                    raise forms.ValidationError(
-                        self.error_messages["invalid_login"],
-                        code="invalid_login",
-                    )
+                self.reject_login(email)
+            login_throttle.clear_failures(email)
 
         return self.cleaned_data
 
+    def reject_login(self, email):
+        """Metodo que conta a tentativa que falhou e recusa o login"""
+        login_throttle.register_failure(self.request, email)
+        raise forms.ValidationError(
+            self.error_messages["invalid_login"],
+            code="invalid_login",
+        )
+
 
 class CustomPasswordResetForm(PasswordResetForm):
     pass
@@ -443,9 +490,52 @@ class ShippingAddressForm(forms.ModelForm):
         return instance
 
     def clean_zip_code(self):
-        return exclude_mask_chars(self.cleaned_data["zip_code"])
+        zip_code = self.cleaned_data["zip_code"]
+        # malformed CEPs are rejected before the index lookup (see clean)
+        if not cep_is_valid(zip_code):
+            raise ValidationError(
+                _("O CEP %(zip_code)s é inválido"),
+                code="invalid",
+                params={"zip_code": zip_code},
+            )
+        return normalize_cep(zip_code)
+
+    def clean(self):
+        """Funcao que valida a cidade e o estado do endereco contra o indice de CEPs"""
+        cleaned_data = super(ShippingAddressForm, self).clean()
+        cep_index = get_cep_index()
+        if cep_index is None or not cleaned_data.get("zip_code"):
+            return cleaned_data
+
+        zip_code_infos = cep_index.lookup(cleaned_data["zip_code"])
+        if zip_code_infos is None:
+            self.add_error(
+                "zip_code",
+                ValidationError(
+                    _("O CEP %(zip_code)s não foi encontrado"),
+                    code="invalid",
+                    params={"zip_code": self.data.get(self.add_prefix("zip_code"))},
+                ),
+            )
+            return cleaned_data
+
+        # the street and the neighborhood only prefill the form: they are spelled in
+        # too many ways ("R." / "Rua") to be checked
+        for field in ("city", "uf"):
+            expected = zip_code_infos[field]
+            value = cleaned_data.get(field)
+            # accents, case and spaces are ignored ("Florianopolis" is "Florianópolis")
+            if expected and value and tokenize(value) != tokenize(expected):
+                self.add_error(
+                    field,
+                    ValidationError(
+                        _("O valor não corresponde ao CEP informado"), code="invalid"
+                    ),
+                )
+        return cleaned_data
 
 
+@lru_cache(maxsize=None)
 def get_shipping_form_layout(page):
     """
     Funcao que obtem o layout do formulario de criacao de um endereco.
@@ -558,37 +648,14 @@ class CustomUserChangeForm(forms.Form):
 
         self.helper = FormHelper()
         self.helper.label_class = "d-flex justify-content-start fs-85"
-        self.helper.layout = Layout(
-            Row(
-                Column("email", css_class="form-group col-md-6"),
-                Column("username", css_class="form-group col-md-6"),
-                css_class="form-row",
-            ),
-            Row(
-                Column("cpf", css_class="form-group col-md-6"),
-                Column("birth_date", css_class="form-group col-md-6"),
-                css_class="form-row",
-            ),
-            Row(
-                Column("gender", css_class="form-group col-md-6"),
-                Column("phone", css_class="form-group col-md-6"),
-                css_class="form-row",
-            ),
-            FormActions(
-                Submit(
-                    "save-changes",
-                    "ALTERAR DADOS",
-                    css_class="btn btn-lg btn-dark",
-                ),
-                css_class="d-flex justify-content-end",
-            ),
-        )
+        self.helper.layout = get_user_change_form_layout()
 
         self.fields["email"].initial = self.user.email
         self.fields["username"].initial = self.user.username
         self.fields["cpf"].initial = self.user.customer.cpf
         self.fields["gender"].initial = self.user.customer.gender
-        self.fields["phone"].initial = self.user.customer.phone
+        # as the masked input sends it, so an unchanged phone isn't a change
+        self.fields["phone"].initial = format_phone(self.user.customer.phone)
         try:
             self.fields["birth_date"].initial = datetime.strftime(
                 self.user.customer.birth_date, "%d/%m/%Y"
@@ -655,17 +722,48 @@ class CustomUserChangeForm(forms.Form):
             )
         return birth_date
 
-    def clean_phone(self):  # TODO: validate phone
-        return exclude_mask_chars(self.cleaned_data["phone"])
+    def clean_phone(self):
+        return clean_phone_field(self.cleaned_data["phone"])
+
+
+@lru_cache(maxsize=None)
+def get_user_change_form_layout():
+    """Funcao que obtem o layout do formulario de alteracao de informacoes de um cliente."""
+    return Layout(
+        Row(
+            Column("email", css_class="form-group col-md-6"),
+            Column("username", css_class="form-group col-md-6"),
+            css_class="form-row",
+        ),
+        Row(
+            Column("cpf", css_class="form-group col-md-6"),
+            Column("birth_date", css_class="form-group col-md-6"),
+            css_class="form-row",
+        ),
+        Row(
+            Column("gender", css_class="form-group col-md-6"),
+            Column("phone", css_class="form-group col-md-6"),
+            css_class="form-row",
+        ),
+        FormActions(
+            Submit(
+                "save-changes",
+                "ALTERAR DADOS",
+                css_class="btn btn-lg btn-dark",
+            ),
+            css_class="d-flex justify-content-end",
+        ),
+    )
 
 
 class ShippingAddressChangeForm(ShippingAddressForm):
     """Classe para o formulario de alteracao de informacoes de um endereco"""
 
-    main = forms.ChoiceField(
+    main = forms.TypedChoiceField(
         label="Tipo de endereço",
         widget=forms.Select(attrs={"class": "form-control"}),
         choices=ADDRESS_TYPE_CHOICES,
+        coerce=lambda value: value == "True",
     )
 
     def __init__(self, *args, **kwargs):
@@ -676,29 +774,7 @@ class ShippingAddressChangeForm(ShippingAddressForm):
         self.helper = FormHelper()
         self.helper.form_tag = False
         self.helper.label_class = "d-flex justify-content-start fs-85"
-        self.helper.layout = Layout(
-            Row(
-                Column("zip_code", css_class="form-group col-md-2"),
-                Column("address", css_class="form-group col-md-8", id="address-col"),
-                Column("number", css_class="form-group col-md-2", id="number-col"),
-                css_class="form-row",
-            ),
-            Row(
-                Column("neighborhood", css_class="form-group col-md-4"),
-                Column("complement", css_class="form-group col-md-4"),
-                Column("reference", css_class="form-group col-md-4"),
-                css_class="form-row",
-                id="neighborhood-complement-reference-row",
-            ),
-            Row(
-                Column("city", css_class="form-group col-md-3"),
-                Column("uf", css_class="form-group col-md-3"),
-                Column("country", css_class="form-group col-md-3"),
-                Column("main", css_class="form-group col-md-3"),
-                css_class="form-row",
-                id="city-uf-country-row",
-            ),
-        )
+        self.helper.layout = get_shipping_address_change_form_layout()
 
         self.fields["zip_code"].initial = self.shipping_address.zip_code
         self.fields["address"].initial = self.shipping_address.address
@@ -713,17 +789,19 @@ class ShippingAddressChangeForm(ShippingAddressForm):
         if self.shipping_address.main:
             self.fields["main"].disabled = True
 
-    def is_valid(self):
-        new_values = {}
-        for field, value in self.data.items():
-            if self.fields.get(field):
-                if field == "number":
-                    value = int(value)
-                if field == "main":
-                    value = value == "True"
-                if self.fields[field].initial != value:
-                    new_values[field] = value
-        return new_values
+    def get_changed_values(self):
+        """
+        Metodo que obtem os campos alterados, ja validados (CEP, cidade e UF) pelo
+        `clean` do formulario de criacao.
+
+        Returns:
+            new_values (dict): Os novos valores dos campos alterados.
+        """
+        return {
+            field: value
+            for field, value in self.cleaned_data.items()
+            if self.fields[field].initial != value
+        }
 
     def save(self, new_values, customer, commit=True):
         # pylint: disable=arguments-differ
@@ -739,6 +817,34 @@ class ShippingAddressChangeForm(ShippingAddressForm):
         return self.shipping_address
 
 
+@lru_cache(maxsize=None)
+def get_shipping_address_change_form_layout():
+    """Funcao que obtem o layout do formulario de alteracao de um endereco."""
+    return Layout(
+        Row(
+            Column("zip_code", css_class="form-group col-md-2"),
+            Column("address", css_class="form-group col-md-8", id="address-col"),
+            Column("number", css_class="form-group col-md-2", id="number-col"),
+            css_class="form-row",
+        ),
+        Row(
+            Column("neighborhood", css_class="form-group col-md-4"),
+            Column("complement", css_class="form-group col-md-4"),
+            Column("reference", css_class="form-group col-md-4"),
+            css_class="form-row",
+            id="neighborhood-complement-reference-row",
+        ),
+        Row(
+            Column("city", css_class="form-group col-md-3"),
+            Column("uf", css_class="form-group col-md-3"),
+            Column("country", css_class="form-group col-md-3"),
+            Column("main", css_class="form-group col-md-3"),
+            css_class="form-row",
+            id="city-uf-country-row",
+        ),
+    )
+
+
 class PaymentForm(forms.ModelForm):
     """Classe para o formulario de definicao de um pagamento"""
 
@@ -825,24 +931,10 @@ class CreditCardForm(forms.Form):
         self.helper.label_class = "d-flex justify-content-start fs-85"
         self.helper.form_tag = False
         self.helper.disable_csrf = True
-        self.helper.layout = Layout(
-            Row(
-                Column("number", css_class="form-group col-md-8"),
-                Column("expiring_date", css_class="form-group col-md-4"),
-                css_class="form-row",
-            ),
-            Row(
-                Column("holder_name", css_class="form-group col-md-9"),
-                Column("security_code", css_class="form-group col-md-3"),
-                css_class="form-row",
-            ),
-            Row(
-                Column("installments", css_class="form-group col-md-12"),
-                css_class="form-row",
-            ),
-        )
+        self.helper.layout = get_credit_card_form_layout()
 
-        self.fields["installments"].choices = organize_installment_text(
+        # callable: the options are only computed when the field is rendered or validated
+        self.fields["installments"].choices = lambda: organize_installment_text(
             self.installments_infos
         )
 
@@ -851,6 +943,27 @@ class CreditCardForm(forms.Form):
         return get_installment_options(total=self.cart_total)
 
 
+@lru_cache(maxsize=None)
+def get_credit_card_form_layout():
+    """Funcao que obtem o layout do formulario de pagamento com cartao de credito."""
+    return Layout(
+        Row(
+            Column("number", css_class="form-group col-md-8"),
+            Column("expiring_date", css_class="form-group col-md-4"),
+            css_class="form-row",
+        ),
+        Row(
+            Column("holder_name", css_class="form-group col-md-9"),
+            Column("security_code", css_class="form-group col-md-3"),
+            css_class="form-row",
+        ),
+        Row(
+            Column("installments", css_class="form-group col-md-12"),
+            css_class="form-row",
+        ),
+    )
+
+
 def organize_installment_text(installments_options):
     """
     Funcao que organiza o texto das opcoes de parcelamento.
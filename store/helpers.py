@@ -1,15 +1,14 @@
 from decimal import Decimal
 
 
-def exclude_mask_chars(value):
-    _value = ""
-    try:
-        for char in value:
-            if char.isdigit():
-                _value += char
-        return _value
-    except TypeError:  # value is None
-        return value
+def update_session(session, **values):
+    """
+    Funcao que atualiza a sessao apenas com os valores que mudaram, de forma que a sessao so
+    seja marcada como modificada (e salva pelo SessionMiddleware) quando necessario.
+    """
+    for key, value in values.items():
+        if key not in session or session[key] != value:
+            session[key] = value
 
 
 def get_installment_options(total):
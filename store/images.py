@@ -0,0 +1,92 @@
+"""
+Geracao das derivadas responsivas (WebP e JPEG, em larguras fixas) das imagens dos produtos.
+
+As derivadas sao salvas no mesmo storage e diretorio da imagem original, com o nome
+`<original>_<largura>w.<extensao>`. Em desenvolvimento o storage eh o FileSystemStorage
+(MEDIA_ROOT), logo o pipeline funciona offline; em producao eh o MediaStorage (S3).
+"""
+
+from io import BytesIO
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+DERIVATIVE_WIDTHS = (100, 200, 400, 800)
+DERIVATIVE_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+
+def get_derivative_name(name, width, extension):
+    stem, _ = os.path.splitext(name)
+    return f"{stem}_{width}w.{extension}"
+
+
+def _save(storage, name, content):
+    """Funcao que salva um arquivo sobrescrevendo o anterior em qualquer storage"""
+    # FileSystemStorage would save "name_<random>.ext" instead of overwriting
+    if not getattr(storage, "file_overwrite", False) and storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def generate_derivatives(name, storage=None):
+    """
+    Funcao que gera as derivadas de uma imagem.
+
+    Args:
+        name (str): Nome da imagem original no storage.
+        storage (Storage): Storage da imagem. Padrao: `default_storage`.
+
+    Returns:
+        widths (list): Larguras geradas. Larguras maiores que a da imagem original nao sao
+            geradas, para nao aumentar a imagem.
+    """
+    # Pillow is only needed here and store.models imports this module on every boot
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    with storage.open(name, "rb") as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+
+    widths = [width for width in DERIVATIVE_WIDTHS if width <= image.width]
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for extension, image_format, save_options in DERIVATIVE_FORMATS:
+            if image_format == "JPEG" and resized.mode != "RGB":
+                converted = resized.convert("RGB")
+            elif image_format == "WEBP" and resized.mode not in ("RGB", "RGBA"):
+                converted = resized.convert("RGBA")
+            else:
+                converted = resized
+
+            buffer = BytesIO()
+            converted.save(buffer, image_format, **save_options)
+            _save(
+                storage,
+                get_derivative_name(name, width, extension),
+                buffer.getvalue(),
+            )
+    return widths
+
+
+def regenerate_derivatives(product_image):
+    """
+    Funcao executada nos processos do pool do comando `regenerate_product_images`.
+
+    Args:
+        product_image (tuple): Tupla (pk do produto, nome da imagem).
+
+    Returns:
+        result (tuple): Tupla (pk do produto, larguras geradas ou None, erro ou None).
+    """
+    pk, name = product_image
+    try:
+        return pk, generate_derivatives(name), None
+    except Exception as error:  # pylint: disable=broad-except
+        return pk, None, f"{type(error).__name__}: {error}"
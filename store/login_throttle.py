@@ -0,0 +1,139 @@
+"""
+Limite de tentativas de login e cache de e-mails desconhecidos.
+
+As tentativas que falharam sao contadas por IP e por e-mail em uma janela deslizante
+(aproximada por dois contadores de janela fixa no cache: o da janela atual e o da
+anterior, ponderado pelo tempo que ainda resta dela). Acima do limite, o login eh
+recusado antes de calcular qualquer hash de senha.
+
+Os e-mails sem usuario ficam em cache por `settings.LOGIN_UNKNOWN_EMAIL_TIMEOUT`, de
+forma que tentativas repetidas com eles (credential stuffing) nao consultam o banco nem
+calculam o hash de senha falso que o `ModelBackend` calcula contra timing attacks.
+
+Os limites valem com qualquer cache (no LocMemCache, cada processo conta as suas
+tentativas). Ja o cache de e-mails desconhecidos exige um cache compartilhado
+(`settings.LOGIN_UNKNOWN_EMAIL_CACHE`): uma copia em outro processo recusaria o login de
+quem acabou de se cadastrar.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+ATTEMPTS_KEY = "login_attempts:{}:{}:{}"
+UNKNOWN_EMAIL_KEY = "login_unknown_email:{}"
+
+
+def get_client_ip(request):
+    """
+    Funcao que obtem o IP do cliente. Atras do roteador do Heroku o IP real eh o ultimo
+    do header X-Forwarded-For (os anteriores sao enviados pelo proprio cliente).
+    """
+    if settings.CLIENT_IP_FROM_X_FORWARDED_FOR:
+        forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        if forwarded_for:
+            return forwarded_for.rsplit(",", 1)[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _digest(value):
+    # cache keys must be short and free of spaces and control characters (memcached)
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def _get_identities(request, email):
+    identities = [
+        ("email", _digest(email.lower()), settings.LOGIN_THROTTLE_EMAIL_LIMIT)
+    ]
+    if request is not None:
+        identities.append(
+            ("ip", _digest(get_client_ip(request)), settings.LOGIN_THROTTLE_IP_LIMIT)
+        )
+    return identities
+
+
+def _get_window():
+    window = settings.LOGIN_THROTTLE_WINDOW
+    now = time.time()
+    # weight of the previous window: the part of it still inside the sliding window
+    return int(now // window), 1 - (now % window) / window
+
+
+def is_throttled(request, email):
+    """
+    Funcao que verifica se o IP ou o e-mail passaram do limite de tentativas que
+    falharam na janela deslizante.
+    """
+    index, previous_weight = _get_window()
+    identities = _get_identities(request, email)
+    keys = {
+        (scope, identity, offset): ATTEMPTS_KEY.format(scope, identity, index - offset)
+        for scope, identity, _ in identities
+        for offset in (0, 1)
+    }
+    counts = cache.get_many(keys.values())
+    for scope, identity, limit in identities:
+        current = counts.get(keys[(scope, identity, 0)], 0)
+        previous = counts.get(keys[(scope, identity, 1)], 0)
+        if current + previous * previous_weight >= limit:
+            return True
+    return False
+
+
+def register_failure(request, email):
+    """Funcao que conta uma tentativa de login que falhou para o IP e o e-mail"""
+    index, _ = _get_window()
+    for scope, identity, _ in _get_identities(request, email):
+        key = ATTEMPTS_KEY.format(scope, identity, index)
+        # kept for two windows: the next one still reads it as the previous window
+        cache.add(key, 0, timeout=2 * settings.LOGIN_THROTTLE_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:  # expired between the add and the incr
+            cache.set(key, 1, timeout=2 * settings.LOGIN_THROTTLE_WINDOW)
+
+
+def clear_failures(email):
+    """Funcao que zera as tentativas do e-mail depois de um login bem sucedido"""
+    index, _ = _get_window()
+    identity = _digest(email.lower())
+    cache.delete_many(
+        [ATTEMPTS_KEY.format("email", identity, index - offset) for offset in (0, 1)]
+    )
+
+
+def is_unknown_email(email):
+    """
+    Funcao que verifica se o e-mail esta em cache como desconhecido (sem diferenciar
+    maiusculas, como o allauth busca os usuarios)
+    """
+    if not settings.LOGIN_UNKNOWN_EMAIL_CACHE:
+        return False
+    return cache.get(UNKNOWN_EMAIL_KEY.format(_digest(email.lower())), False)
+
+
+def remember_unknown_email(email):
+    """
+    Funcao que guarda em cache um e-mail sem usuario (sem diferenciar maiusculas, como o
+    allauth busca os usuarios)
+    """
+    if not settings.LOGIN_UNKNOWN_EMAIL_CACHE:
+        return
+    cache.set(
+        UNKNOWN_EMAIL_KEY.format(_digest(email.lower())),
+        True,
+        timeout=settings.LOGIN_UNKNOWN_EMAIL_TIMEOUT,
+    )
+
+
+def forget_unknown_email(email):
+    forget_unknown_emails([email])
+
+
+def forget_unknown_emails(emails):
+    """Funcao que esquece os e-mails desconhecidos que ganharam uma conta"""
+    cache.delete_many(
+        [UNKNOWN_EMAIL_KEY.format(_digest(email.lower())) for email in emails]
+    )
@@ -0,0 +1,104 @@
+"""Utilitarios compartilhados pelos comandos de benchmark"""
+
+from contextlib import contextmanager, ExitStack
+import statistics
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from store.models import Customer, Order, OrderItem, Product
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Contexto que cria um banco de dados de teste descartavel para os benchmarks, de forma que
+    eles nunca escrevam no banco de dados real.
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    # the replicas read from the test database, like the test runner does with mirrors
+    replica_settings = {}
+    for alias in settings.REPLICA_DATABASES:
+        replica_settings[alias] = connections[alias].settings_dict.copy()
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        # the manifest storage requires collectstatic, which benchmarks shouldn't depend on
+        with override_settings(
+            STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+        ):
+            yield
+    finally:
+        for alias, replica_settings_dict in replica_settings.items():
+            connections[alias].close()
+            connections[alias].settings_dict.update(replica_settings_dict)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def capture_queries():
+    """
+    Contexto que captura as consultas feitas em todos os bancos (o default e as
+    replicas). A lista eh preenchida ao sair do contexto.
+    """
+    queries = []
+    with ExitStack() as stack:
+        contexts = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        ]
+        yield queries
+    for context in contexts:
+        queries.extend(context.captured_queries)
+
+
+def create_cart_client(n_items):
+    """
+    Funcao que cria um cliente HTTP anonimo com um carrinho contendo `n_items` produtos.
+
+    Returns:
+        client (django.test.Client): Cliente com o cookie `device` do carrinho.
+        order (store.models.Order): O pedido em aberto do carrinho.
+    """
+    device = str(uuid4())
+    customer = Customer.objects.create(device=device)
+    order = Order.objects.create(customer=customer)
+    for i in range(n_items):
+        product = Product.objects.create(
+            name=f"Helga's Pasta de amendoim {i}", price=f"{20 + i}.90"
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=i + 1)
+
+    client = Client()
+    client.cookies["device"] = device
+    return client, order
+
+
+def measure(func, repeat):
+    """Funcao que mede o tempo (em segundos) de `repeat` execucoes de `func`"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def format_timings(label, timings):
+    """Funcao que formata as estatisticas de um conjunto de medicoes em milissegundos"""
+    return (
+        f"{label}: media {statistics.mean(timings) * 1000:.2f}ms, "
+        f"mediana {statistics.median(timings) * 1000:.2f}ms, "
+        f"min {min(timings) * 1000:.2f}ms ({len(timings)} execucoes)"
+    )
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from store.forms import (
+    get_credit_card_form_layout,
+    get_customer_creation_form_layout,
+    get_shipping_address_change_form_layout,
+    get_shipping_form_layout,
+    get_user_change_form_layout,
+    get_user_creation_form_layout,
+)
+
+from ._benchmark import benchmark_database, create_cart_client, format_timings, measure
+
+LAYOUT_FACTORIES = (
+    get_credit_card_form_layout,
+    get_customer_creation_form_layout,
+    get_shipping_address_change_form_layout,
+    get_shipping_form_layout,
+    get_user_change_form_layout,
+    get_user_creation_form_layout,
+)
+
+
+def clear_layout_caches():
+    for factory in LAYOUT_FACTORIES:
+        factory.cache_clear()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo de renderizacao da pagina de checkout com os layouts dos formularios "
+        "reconstruidos a cada requisicao e com os layouts em cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--items", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            client, _ = create_cart_client(n_items=options["items"])
+            client.get("/checkout/")  # warmup: template loading, url resolving...
+
+            for method, request in (
+                ("GET", lambda: client.get("/checkout/")),
+                ("POST invalido", lambda: client.post("/checkout/", {})),
+            ):
+
+                def uncached():
+                    clear_layout_caches()
+                    request()
+
+                self.stdout.write(
+                    format_timings(
+                        f"{method} sem cache de layout",
+                        measure(uncached, options["repeat"]),
+                    )
+                )
+                self.stdout.write(
+                    format_timings(
+                        f"{method} com cache de layout",
+                        measure(request, options["repeat"]),
+                    )
+                )
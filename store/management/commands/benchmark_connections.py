@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ._benchmark import format_timings, measure
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo da conexao ao banco por requisicao sob o gunicorn: sobe o servidor "
+        "com uma conexao nova por requisicao, com conexoes persistentes e (no PostgreSQL) "
+        "com o pool, e compara a latencia de GETs no caminho informado. Usa o banco "
+        "configurado, logo o caminho deve ser somente de leitura."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--path", default="/")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=1)
+
+    @contextmanager
+    def gunicorn(self, env, options):
+        url = f"http://127.0.0.1:{options['port']}{options['path']}"
+        # gunicorn 20.0 can't be run with python -m
+        executable = shutil.which(
+            "gunicorn", path=os.path.dirname(sys.executable)
+        ) or shutil.which("gunicorn")
+        if executable is None:
+            raise CommandError("gunicorn nao encontrado")
+        server = subprocess.Popen(
+            [
+                executable,
+                "PeanutButter.wsgi",
+                "--bind",
+                f"127.0.0.1:{options['port']}",
+                "--workers",
+                str(options["workers"]),
+                "--threads",
+                str(options["threads"]),
+            ],
+            env={**os.environ, **env},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    requests.get(url, timeout=1)
+                    break
+                except requests.ConnectionError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise CommandError("O gunicorn nao subiu")
+                    time.sleep(0.2)
+            yield url
+        finally:
+            server.terminate()
+            server.wait()
+
+    def handle(self, *args, **options):
+        modes = [
+            ("conexao por requisicao", {"DATABASE_CONN_MAX_AGE": "0"}),
+            ("conexoes persistentes", {"DATABASE_CONN_MAX_AGE": "600"}),
+        ]
+        if connection.vendor == "postgresql":
+            modes.append(("pool", {"DATABASE_POOL_SIZE": str(options["threads"])}))
+
+        means = {}
+        for label, env in modes:
+            with self.gunicorn(env, options) as url:
+                # keeps the device cookie, so only the first request creates a cart
+                session = requests.Session()
+                for _ in range(10):
+                    session.get(url)  # warmup: fills the persistent connections
+
+                def get():
+                    session.get(url).raise_for_status()
+
+                timings = measure(get, options["repeat"])
+            means[label] = statistics.mean(timings)
+            self.stdout.write(format_timings(label, timings))
+
+        overhead = means["conexao por requisicao"] - means["conexoes persistentes"]
+        self.stdout.write(
+            f"Custo da conexao ({connection.vendor}): {overhead * 1000:.2f}ms por requisicao"
+        )
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.test import override_settings
+
+from store.media import clear_media_urls, resolve_product_media_urls
+from store.models import Product
+
+from ._benchmark import benchmark_database, format_timings, measure
+
+# what the navbar, cart, store and order pages touch per item
+ITEMS_TEMPLATE = Template(
+    "{% load custom_filters %}{% for product in products %}"
+    '{% responsive_image product sizes="100px" css_class="row-img" %}'
+    '<img src="{{product.image_url}}"><img src="{{product.nutritional_infos_url}}">'
+    "{% endfor %}"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo de template por item gasto com as URLs das imagens dos produtos, "
+        "com e sem a memoizacao das URLs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--storage",
+            help="Storage a ser medido, ex.: PeanutButter.media_storage.MediaStorage",
+        )
+
+    def handle(self, *args, **options):
+        storage_settings = {}
+        if options["storage"]:
+            storage_settings["DEFAULT_FILE_STORAGE"] = options["storage"]
+
+        with benchmark_database(), override_settings(**storage_settings):
+            Product.objects.bulk_create(
+                Product(
+                    name=f"Helga's Pasta de amendoim {i}",
+                    price="29.90",
+                    main_image=f"pasta_{i}.png",
+                    main_image_widths="100,200,400,800",
+                    nutritional_infos_image=f"tabela_nutricional_{i}.png",
+                )
+                for i in range(options["products"])
+            )
+            products = list(Product.objects.all())
+            n_products = len(products)
+
+            def render():
+                ITEMS_TEMPLATE.render(Context({"products": products}))
+
+            def render_uncached():
+                clear_media_urls()
+                render()
+
+            def resolve_and_render():
+                clear_media_urls()
+                resolve_product_media_urls(products)
+                render()
+
+            render()  # warmup
+            for label, func in (
+                ("sem memoizacao", render_uncached),
+                ("resolvendo a lista em lote", resolve_and_render),
+                ("memoizado", render),
+            ):
+                timings = [
+                    timing / n_products for timing in measure(func, options["repeat"])
+                ]
+                self.stdout.write(format_timings(f"{label} (por item)", timings))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from ._benchmark import format_timings, measure
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo do `migrate` em um banco de dados limpo, como o de cada execucao "
+        "dos testes e de cada ambiente novo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(
+            executor.loader.graph.leaf_nodes(), clean_start=True
+        )
+        store_plan = [
+            migration for migration, _ in plan if migration.app_label == "store"
+        ]
+        self.stdout.write(
+            f"{len(plan)} migracoes em um banco limpo, {len(store_plan)} da loja "
+            f"({sum(len(migration.operations) for migration in store_plan)} operacoes)"
+        )
+
+        def migrate():
+            # the same path as the test runner: creates the database and runs migrate
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        timings = measure(migrate, options["repeat"])
+        # what a test run or a release pays: the later runs reuse the rendered states
+        self.stdout.write(f"primeira execucao: {timings[0] * 1000:.2f}ms")
+        self.stdout.write(format_timings(f"migrate ({connection.vendor})", timings))
@@ -0,0 +1,93 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from store.normalizers import (
+    format_cpf,
+    normalize_phone,
+    only_digits,
+    only_digits_batch,
+    validate_cpfs,
+)
+from store.validators import cpf_is_valid
+
+
+def legacy_exclude_mask_chars(value):
+    """Implementacao original de `exclude_mask_chars`, usada como referencia"""
+    _value = ""
+    try:
+        for char in value:
+            if char.isdigit():
+                _value += char
+        return _value
+    except TypeError:  # value is None
+        return value
+
+
+def random_digits(size):
+    return "".join(random.choice("0123456789") for _ in range(size))
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmarks da normalizacao de CEPs, CPFs e telefones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        size = options["size"]
+        samples = {
+            "CEP": [f"{random_digits(5)}-{random_digits(3)}" for _ in range(size)],
+            "CPF": [format_cpf(random_digits(11)) for _ in range(size)],
+            "Telefone": [
+                f"({random_digits(2)}) 9{random_digits(4)}-{random_digits(4)}"
+                for _ in range(size)
+            ],
+        }
+
+        for label, values in samples.items():
+            self.report(
+                f"{label} exclude_mask_chars original",
+                lambda values=values: [legacy_exclude_mask_chars(v) for v in values],
+                size,
+                options["repeat"],
+            )
+            self.report(
+                f"{label} only_digits",
+                lambda values=values: [only_digits(v) for v in values],
+                size,
+                options["repeat"],
+            )
+            self.report(
+                f"{label} only_digits_batch",
+                lambda values=values: only_digits_batch(values),
+                size,
+                options["repeat"],
+            )
+
+        self.report(
+            "Telefone normalize_phone",
+            lambda: [normalize_phone(v) for v in samples["Telefone"]],
+            size,
+            options["repeat"],
+        )
+        self.report(
+            "CPF validacao um a um",
+            lambda: [
+                cpf_is_valid(legacy_exclude_mask_chars(v)) for v in samples["CPF"]
+            ],
+            size,
+            options["repeat"],
+        )
+        self.report(
+            "CPF validacao em lote",
+            lambda: validate_cpfs(samples["CPF"]),
+            size,
+            options["repeat"],
+        )
+
+    def report(self, label, func, size, repeat):
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        self.stdout.write(f"{label}: {best / size * 1e9:.0f}ns por valor")
@@ -0,0 +1,126 @@
+import statistics
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from PeanutButter.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+from store.models import CustomUser
+
+from ._benchmark import format_timings, measure
+
+PASSWORD = "pasta-de-amendoim-123"
+
+
+def parse_argon2_policy(value):
+    """Funcao que converte "time_cost:memory_cost:parallelism" nas settings do Argon2"""
+    time_cost, memory_cost, parallelism = (int(part) for part in value.split(":"))
+    return {
+        "PASSWORD_ARGON2_TIME_COST": time_cost,
+        "PASSWORD_ARGON2_MEMORY_COST": memory_cost,
+        "PASSWORD_ARGON2_PARALLELISM": parallelism,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a latencia do hash de senha de cada politica (hasher e custo). Cada "
+        "login, cadastro e troca de senha calcula ao menos um hash no worker que "
+        "atende a requisicao; um login com a senha errada calcula um por backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            nargs="+",
+            default=[100000, 180000, 260000, 390000],
+            help="Iteracoes do PBKDF2",
+        )
+        parser.add_argument(
+            "--argon2",
+            type=parse_argon2_policy,
+            nargs="+",
+            default=[parse_argon2_policy("2:512:2"), parse_argon2_policy("2:102400:8")],
+            help="Custos do Argon2 (time_cost:memory_cost em KiB:parallelism)",
+        )
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument(
+            "--skip-users",
+            action="store_true",
+            help="Nao conta as senhas do banco que serao refeitas no proximo login",
+        )
+
+    def get_policies(self, options):
+        """
+        Metodo que lista as politicas medidas.
+
+        Returns:
+            policies (list): Tuplas (descricao, classe do hasher, settings do custo).
+        """
+        policies = [
+            (
+                f"pbkdf2 {n} iteracoes",
+                PBKDF2PasswordHasher,
+                {"PASSWORD_PBKDF2_ITERATIONS": n},
+            )
+            for n in options["iterations"]
+        ]
+        for costs in options["argon2"]:
+            label = "argon2 time_cost={} memory_cost={}KiB parallelism={}".format(
+                *costs.values()
+            )
+            policies.append((label, Argon2PasswordHasher, costs))
+        return policies
+
+    def is_current(self, hasher_class, costs):
+        return hasher_class is type(get_hasher()) and all(
+            getattr(settings, name) == value for name, value in costs.items()
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Politica atual: {settings.PASSWORD_HASHERS[0]}")
+        for label, hasher_class, costs in self.get_policies(options):
+            if self.is_current(hasher_class, costs):
+                label += " (atual)"
+            with override_settings(**costs):
+                hasher = hasher_class()
+                try:
+                    timings = measure(
+                        lambda: hasher.encode(PASSWORD, hasher.salt()),
+                        options["repeat"],
+                    )
+                except ValueError as error:  # library not installed (argon2-cffi)
+                    self.stdout.write(f"{label}: {error}")
+                    continue
+            self.stdout.write(
+                format_timings(label, timings)
+                + f", ~{1 / statistics.median(timings):.1f} hashes/s por worker"
+            )
+
+        if not options["skip_users"]:
+            self.report_outdated_passwords()
+
+    def report_outdated_passwords(self):
+        """
+        Metodo que conta as senhas guardadas com outro hasher ou custo, que serao
+        refeitas (com a politica atual) no proximo login de cada usuario.
+        """
+        preferred = get_hasher()
+        total = outdated = 0
+        for encoded in (
+            CustomUser.objects.exclude(password="")
+            .values_list("password", flat=True)
+            .iterator()
+        ):
+            try:
+                hasher = identify_hasher(encoded)
+            except ValueError:  # unusable password (social login)
+                continue
+            total += 1
+            if hasher.algorithm != preferred.algorithm or hasher.must_update(encoded):
+                outdated += 1
+        self.stdout.write(
+            f"{outdated} de {total} senhas serao refeitas no proximo login"
+        )
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from store.models import Customer, CustomUser, Order, OrderItem, Product
+
+from ._benchmark import benchmark_database, capture_queries, format_timings, measure
+
+SESSION_ENGINES = (
+    ("db", "django.contrib.sessions.backends.db"),
+    ("cached_db", "django.contrib.sessions.backends.cached_db"),
+)
+PATHS = ("/", "/cart/", "/user_page/", "/user_page/profile", "/checkout/")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o numero de consultas ao banco (totais e na tabela de sessoes) por "
+        "requisicao de um usuario autenticado com sessoes no banco e com cached_db."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = CustomUser.objects.create_user(
+                email="benchmark@helgas.com", username="Benchmark Helgas"
+            )
+            customer = Customer.objects.create(user=user, cpf="52998224725")
+            order = Order.objects.create(customer=customer)
+            product = Product.objects.create(name="Helga's Pasta", price="29.90")
+            OrderItem.objects.create(order=order, product=product, quantity=2)
+
+            # cached_db is only the default with a shared cache (CACHE_BACKEND)
+            default_label = next(
+                label
+                for label, engine in SESSION_ENGINES
+                if engine == settings.SESSION_ENGINE
+            )
+            kind = "compartilhado" if settings.CACHE_IS_SHARED else "por processo"
+            self.stdout.write(f"SESSION_ENGINE padrao: {default_label} (cache {kind})")
+
+            for label, engine in SESSION_ENGINES:
+                cache.clear()
+                with override_settings(SESSION_ENGINE=engine):
+                    client = Client()  # the session middleware reads the engine on init
+                    client.force_login(user)
+                    for path in PATHS:
+                        client.get(path)  # warmup: fills the session cache
+
+                    self.stdout.write(f"SESSION_ENGINE={label}")
+                    for path in PATHS:
+                        # the replicas too: some pages read from them
+                        with capture_queries() as queries:
+                            client.get(path)
+                        session_queries = [
+                            query
+                            for query in queries
+                            if "django_session" in query["sql"]
+                        ]
+                        self.stdout.write(
+                            f"  {path}: {len(queries)} consultas, "
+                            f"{len(session_queries)} na tabela de sessoes"
+                        )
+                    self.stdout.write(
+                        "  "
+                        + format_timings(
+                            "todas as paginas",
+                            measure(
+                                lambda: [client.get(path) for path in PATHS],
+                                options["repeat"],
+                            ),
+                        )
+                    )
@@ -0,0 +1,122 @@
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext, ContextList
+from django.utils import timezone
+
+from store.models import (
+    Customer,
+    CustomUser,
+    Order,
+    OrderItem,
+    Payment,
+    ShippingAddress,
+    ShippingService,
+)
+
+from ._benchmark import benchmark_database, create_cart_client, format_timings, measure
+
+LOADERS = (
+    ("sem cache", settings.TEMPLATE_LOADERS),
+    ("cached", [("django.template.loaders.cached.Loader", settings.TEMPLATE_LOADERS)]),
+)
+
+
+def get_templates_setting(loaders):
+    templates = deepcopy(settings.TEMPLATES)
+    templates[0]["OPTIONS"]["loaders"] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo de renderizacao do template de cada pagina (sem a view), com e sem "
+        "o loader em cache: a primeira renderizacao (compilacao) e as seguintes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--items", type=int, default=10, help="Itens no carrinho")
+
+    def get_pages(self, n_items):
+        """
+        Metodo que cria os dados e retorna as paginas medidas.
+
+        Returns:
+            pages (list): Tuplas (cliente, caminho).
+        """
+        client, order = create_cart_client(n_items)
+        product = order.orderitem_set.first().product
+
+        user = CustomUser.objects.create_user(
+            email="benchmark@helgas.com", username="Benchmark Helgas"
+        )
+        customer = Customer.objects.create(user=user, cpf="52998224725")
+        address = ShippingAddress.objects.create(
+            customer=customer,
+            zip_code="88037-310",
+            address="Rua Helga",
+            neighborhood="Centro",
+            number=1,
+            city="Florianopolis",
+            uf="SC",
+            main=True,
+        )
+        requested_order = Order.objects.create(
+            customer=customer,
+            status="requested",
+            requested_at=timezone.now(),
+            shipping_address=address,
+            payment=Payment.objects.create(
+                payment_type="bank_slip",
+                number_of_installments=1,
+                value_of_installment="29.90",
+            ),
+            shipping_service=ShippingService.objects.create(
+                service_code="04014", price="10.00", days_to_deliver=3
+            ),
+        )
+        OrderItem.objects.create(order=requested_order, product=product, quantity=1)
+        user_client = client.__class__()
+        user_client.force_login(user)
+
+        return [
+            (client, "/"),
+            (client, f"/product/{product.pk}"),
+            (client, "/search/?q=amendoim"),
+            (client, "/cart/"),
+            (client, "/checkout/"),
+            (user_client, "/user_page/"),
+            (user_client, f"/user_page/order/{requested_order.pk}"),
+            (user_client, "/user_page/profile"),
+        ]
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            for client, path in self.get_pages(options["items"]):
+                response = client.get(path)
+                contexts = response.context
+                if not isinstance(contexts, ContextList):
+                    contexts = [contexts]
+                template_name = response.templates[0].name
+                # the context of the page template, without the view's work
+                context = contexts[0].flatten()
+
+                def render():
+                    render_to_string(template_name, context, response.wsgi_request)
+
+                self.stdout.write(f"{path} ({template_name}):")
+                for label, loaders in LOADERS:
+                    with override_settings(TEMPLATES=get_templates_setting(loaders)):
+                        with CaptureQueriesContext(connection) as queries:
+                            first = measure(render, 1)[0]
+                        timings = measure(render, options["repeat"])
+                    self.stdout.write(
+                        f"  {label}: primeira {first * 1000:.2f}ms, "
+                        f"{len(queries)} consultas; "
+                        + format_timings("seguintes", timings)
+                    )
@@ -0,0 +1,58 @@
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store.cep import write_cep_index
+from store.normalizers import normalize_cep
+
+COLUMNS = ("cep", "logradouro", "bairro", "cidade", "uf")
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o indice local de CEPs a partir de um CSV com as colunas "
+        f"{', '.join(COLUMNS)}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--delimiter", default=",")
+        parser.add_argument("--encoding", default="utf-8")
+        parser.add_argument("--output", default=settings.CEP_INDEX_PATH)
+
+    def handle(self, *args, **options):
+        skipped = 0
+
+        def read_records(reader):
+            nonlocal skipped
+            for row in reader:
+                zip_code = normalize_cep(row["cep"] or "")
+                if len(zip_code) != 8:
+                    skipped += 1
+                    continue
+                yield (
+                    zip_code,
+                    row["logradouro"] or "",
+                    row["bairro"] or "",
+                    row["cidade"] or "",
+                    row["uf"] or "",
+                )
+
+        with open(
+            options["csv_path"], newline="", encoding=options["encoding"]
+        ) as file:
+            reader = csv.DictReader(file, delimiter=options["delimiter"])
+            missing_columns = set(COLUMNS) - set(reader.fieldnames or ())
+            if missing_columns:
+                raise CommandError(
+                    f"Colunas ausentes no CSV: {', '.join(sorted(missing_columns))}"
+                )
+            count = write_cep_index(read_records(reader), options["output"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} CEPs importados para {options['output']} "
+                f"({skipped} linhas ignoradas)."
+            )
+        )
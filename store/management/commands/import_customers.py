@@ -0,0 +1,184 @@
+import csv
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from store.login_throttle import forget_unknown_emails
+from store.normalizers import normalize_cpfs, normalize_phones
+from store.models import Customer, CustomUser
+from store.validators import cpfs_are_valid
+
+REQUIRED_COLUMNS = ("cpf",)
+OPTIONAL_COLUMNS = ("nome", "email", "telefone", "data_nascimento", "sexo")
+GENDERS = {"M": "MAS", "MAS": "MAS", "F": "FEM", "FEM": "FEM"}
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d")
+
+
+def parse_birth_date(value):
+    if not value:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa clientes de um CSV legado (colunas: cpf e, opcionalmente, "
+        f"{', '.join(OPTIONAL_COLUMNS)}). Clientes com e-mail ganham um usuario sem senha, "
+        "que pode ser ativado pelo 'esqueci minha senha'. Linhas invalidas ou duplicadas "
+        "sao escritas no arquivo de rejeitados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--delimiter", default=",")
+        parser.add_argument("--encoding", default="utf-8")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--reject-file",
+            help="Padrao: <csv_path>.rejeitados.csv",
+        )
+
+    def handle(self, *args, **options):
+        reject_path = options["reject_file"] or f"{options['csv_path']}.rejeitados.csv"
+        imported = rejected = 0
+        seen_cpfs, seen_emails = set(), set()
+
+        with open(
+            options["csv_path"], newline="", encoding=options["encoding"]
+        ) as file, open(reject_path, "w", newline="", encoding="utf-8") as reject_file:
+            reader = csv.DictReader(file, delimiter=options["delimiter"])
+            fieldnames = reader.fieldnames or []
+            if not set(REQUIRED_COLUMNS).issubset(fieldnames):
+                raise CommandError("O CSV deve conter a coluna 'cpf'")
+
+            rejects = csv.DictWriter(reject_file, fieldnames=[*fieldnames, "motivo"])
+            rejects.writeheader()
+
+            while True:
+                chunk = list(islice(reader, options["chunk_size"]))
+                if not chunk:
+                    break
+
+                rows, reasons = self.validate_chunk(chunk, seen_cpfs, seen_emails)
+                for row, reason in reasons:
+                    rejects.writerow({**row, "motivo": reason})
+                rejected += len(reasons)
+                imported += self.insert_chunk(rows)
+
+                self.stdout.write(
+                    f"{imported} clientes importados, {rejected} rejeitados"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{imported} clientes importados. "
+                f"{rejected} linhas rejeitadas em {reject_path}."
+            )
+        )
+
+    def validate_chunk(self, chunk, seen_cpfs, seen_emails):
+        """
+        Metodo que normaliza e valida um lote de linhas do CSV.
+
+        As linhas com CPFs ou e-mails ja cadastrados sao detectadas com uma unica consulta
+        por lote para cada campo.
+
+        Returns:
+            rows (list): Linhas validas, ja normalizadas.
+            reasons (list): Tuplas (linha original, motivo) das linhas rejeitadas.
+        """
+        reasons = []
+        cpfs = normalize_cpfs([row["cpf"] or "" for row in chunk])
+        phones = normalize_phones([row.get("telefone") or "" for row in chunk])
+        emails = [
+            CustomUser.objects.normalize_email((row.get("email") or "").strip())
+            for row in chunk
+        ]
+        existing_cpfs = set(
+            Customer.objects.filter(cpf__in=cpfs).values_list("cpf", flat=True)
+        )
+        existing_emails = set(
+            CustomUser.objects.filter(email__in=[e for e in emails if e]).values_list(
+                "email", flat=True
+            )
+        )
+
+        rows = []
+        for row, cpf, email, phone, valid in zip(
+            chunk, cpfs, emails, phones, cpfs_are_valid(cpfs)
+        ):
+            if not valid:
+                reasons.append((row, "CPF inválido"))
+                continue
+            if cpf in existing_cpfs or cpf in seen_cpfs:
+                reasons.append((row, "CPF já cadastrado"))
+                continue
+            if email and (email in existing_emails or email in seen_emails):
+                reasons.append((row, "E-mail já cadastrado"))
+                continue
+            try:
+                birth_date = parse_birth_date(
+                    (row.get("data_nascimento") or "").strip()
+                )
+            except ValueError:
+                reasons.append((row, "Data de nascimento inválida"))
+                continue
+
+            seen_cpfs.add(cpf)
+            if email:
+                seen_emails.add(email)
+            rows.append(
+                {
+                    "cpf": cpf,
+                    "email": email,
+                    "username": (row.get("nome") or "").strip(),
+                    "phone": phone,
+                    "gender": GENDERS.get((row.get("sexo") or "").strip().upper(), ""),
+                    "birth_date": birth_date,
+                }
+            )
+        return rows, reasons
+
+    @staticmethod
+    def insert_chunk(rows):
+        """Metodo que insere um lote de clientes (e seus usuarios) com `bulk_create`"""
+        with transaction.atomic():
+            users = [
+                CustomUser(
+                    email=row["email"],
+                    username=row["username"],
+                    password=make_password(None),
+                )
+                for row in rows
+                if row["email"]
+            ]
+            CustomUser.objects.bulk_create(users)
+            # bulk_create doesn't set the pks on every backend, so they are read back at once
+            user_ids = dict(
+                CustomUser.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", "id")
+            )
+            Customer.objects.bulk_create(
+                [
+                    Customer(
+                        user_id=user_ids.get(row["email"]),
+                        cpf=row["cpf"],
+                        phone=row["phone"],
+                        gender=row["gender"],
+                        birth_date=row["birth_date"],
+                    )
+                    for row in rows
+                ]
+            )
+        # bulk_create skips CustomUser.save(), which forgets the email as unknown
+        forget_unknown_emails([user.email for user in users])
+        return len(rows)
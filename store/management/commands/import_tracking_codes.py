@@ -0,0 +1,60 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.tracking import get_columns, import_tracking_codes
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa os codigos de rastreio do arquivo de postagem da transportadora (CSV com "
+        "as colunas 'rastreio' e 'pedido' ou 'transacao') e move os pedidos em preparo "
+        "para 'Pedido enviado'. Linhas invalidas sao escritas no arquivo de rejeitados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--delimiter", default=",")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--reject-file",
+            help="Padrao: <csv_path>.rejeitados.csv",
+        )
+
+    def handle(self, *args, **options):
+        reject_path = options["reject_file"] or f"{options['csv_path']}.rejeitados.csv"
+        updated = shipped = rejected = 0
+
+        with open(
+            options["csv_path"], newline="", encoding=options["encoding"]
+        ) as file, open(reject_path, "w", newline="", encoding="utf-8") as reject_file:
+            reader = csv.DictReader(file, delimiter=options["delimiter"])
+            try:
+                get_columns(reader.fieldnames)
+            except ValueError as error:
+                raise CommandError(error)
+
+            rejects = csv.DictWriter(
+                reject_file, fieldnames=[*reader.fieldnames, "motivo"]
+            )
+            rejects.writeheader()
+            for chunk_updated, chunk_shipped, chunk_rejected in import_tracking_codes(
+                reader, chunk_size=options["chunk_size"]
+            ):
+                for row, reason in chunk_rejected:
+                    rejects.writerow({**row, "motivo": reason})
+                updated += chunk_updated
+                shipped += chunk_shipped
+                rejected += len(chunk_rejected)
+                self.stdout.write(
+                    f"{updated} codigos atualizados, {shipped} pedidos enviados, "
+                    f"{rejected} rejeitados"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{updated} codigos de rastreio atualizados, {shipped} pedidos enviados. "
+                f"{rejected} linhas rejeitadas em {reject_path}."
+            )
+        )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.shipment_tracking import poll_shipments
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza o rastreio dos pedidos enviados e nao entregues, consultando a "
+        "transportadora em lotes e em paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Codigos por requisicao")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="Repete a consulta a cada N segundos (padrao: consulta uma vez)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            tracked, delivered, errors = poll_shipments(
+                batch_size=options["batch_size"], concurrency=options["concurrency"]
+            )
+            self.stdout.write(
+                f"{tracked} codigos rastreados, {delivered} entregues, "
+                f"{errors} lotes com erro ({time.perf_counter() - start:.2f}s)"
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
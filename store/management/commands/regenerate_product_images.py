@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from PeanutButter.replicas import replica_reads
+from store.images import regenerate_derivatives
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Regera as derivadas responsivas das imagens principais dos produtos em um pool "
+        "de processos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Regera apenas os produtos que ainda nao tem derivadas",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(main_image="").exclude(main_image=None)
+        if options["missing"]:
+            products = products.filter(main_image_widths="")
+        with replica_reads():
+            product_images = list(products.values_list("pk", "main_image"))
+
+        # the workers only touch the storage; connections must not be shared with them
+        connections.close_all()
+
+        widths_by_pk, errors = {}, 0
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as executor:
+            for pk, widths, error in executor.map(
+                regenerate_derivatives, product_images, chunksize=4
+            ):
+                if error is not None:
+                    errors += 1
+                    self.stderr.write(f"Produto {pk}: {error}")
+                    continue
+                widths_by_pk[pk] = ",".join(str(width) for width in widths)
+
+        with transaction.atomic():
+            products_to_update = list(
+                Product.objects.filter(pk__in=widths_by_pk).only("pk")
+            )
+            for product in products_to_update:
+                product.main_image_widths = widths_by_pk[product.pk]
+            Product.objects.bulk_update(products_to_update, ["main_image_widths"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Derivadas de {len(widths_by_pk)} produtos regeradas ({errors} erros)."
+            )
+        )
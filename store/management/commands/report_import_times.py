@@ -0,0 +1,102 @@
+from collections import defaultdict
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# what each entry point imports before it can serve a request or run a command
+TARGETS = {
+    "wsgi": "import PeanutButter.wsgi",
+    "urls": "import PeanutButter.wsgi, PeanutButter.urls",
+    "manage": "import django; django.setup()",
+}
+# modules that should only be imported on first use
+HEAVY_MODULES = ("requests", "boto3", "botocore", "PIL", "defusedxml", "django.test")
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_importtime(code):
+    """
+    Funcao que importa `code` em um interpretador novo com `-X importtime`.
+
+    Returns:
+        imports (list): Tuplas (modulo, tempo proprio, tempo acumulado, nivel), com os
+            tempos em microssegundos e nivel 0 para as importacoes do proprio `code`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            level = (len(indent) - 1) // 2
+            imports.append((module, int(self_us), int(cumulative_us), level))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Relata o tempo de importacao de um ponto de entrada (boot do worker, primeira "
+        "requisicao ou comandos do manage.py): os pacotes e modulos mais lentos e os "
+        "modulos pesados que deveriam ser importados so no primeiro uso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=TARGETS, default="wsgi")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        runs = [
+            run_importtime(TARGETS[options["target"]]) for _ in range(options["repeat"])
+        ]
+        totals = [
+            sum(cumulative for _, _, cumulative, level in imports if level == 0)
+            for imports in runs
+        ]
+        # the report uses the fastest run, the least disturbed by the machine
+        imports = runs[totals.index(min(totals))]
+
+        self.stdout.write(
+            f"{options['target']}: {len(imports)} modulos, mediana "
+            f"{statistics.median(totals) / 1000:.1f}ms, min {min(totals) / 1000:.1f}ms "
+            f"({options['repeat']} execucoes)"
+        )
+
+        by_package = defaultdict(int)
+        for module, self_us, _, _ in imports:
+            by_package[module.split(".")[0]] += self_us
+        self.stdout.write("\nPacotes (tempo proprio somado):")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[
+            : options["top"]
+        ]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}ms  {package}")
+
+        self.stdout.write("\nModulos (tempo acumulado):")
+        for module, _, cumulative_us, _ in sorted(imports, key=lambda item: -item[2])[
+            : options["top"]
+        ]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f}ms  {module}")
+
+        imported = {module for module, _, _, _ in imports}
+        heavy = [module for module in HEAVY_MODULES if module in imported]
+        if heavy:
+            self.stdout.write(
+                self.style.WARNING(f"\nModulos pesados importados: {', '.join(heavy)}")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNenhum modulo pesado importado"))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.choices import ORDER_STATUSES
+from store.models import Order
+from store.order_status import (
+    get_source_statuses,
+    InvalidStatusTransition,
+    transition_orders,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move pedidos para um status, validando as transicoes da maquina de estados e "
+        "registrando a auditoria. Pedidos que nao podem ir para o status sao ignorados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "status",
+            choices=[
+                status for status, _ in ORDER_STATUSES if get_source_statuses(status)
+            ],
+        )
+        parser.add_argument("--ids", nargs="+", type=int, help="Ids dos pedidos")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Move todos os pedidos que podem ir para o status",
+        )
+
+    def handle(self, *args, **options):
+        if bool(options["ids"]) == options["all"]:
+            raise CommandError("Informe --ids ou --all")
+
+        to_status = options["status"]
+        if options["all"]:
+            orders = Order.objects.filter(status__in=get_source_statuses(to_status))
+        else:
+            orders = Order.objects.filter(pk__in=options["ids"])
+
+        try:
+            moved, skipped = transition_orders(orders, to_status)
+        except InvalidStatusTransition as error:
+            raise CommandError(error)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{moved} pedido(s) movido(s) para '{to_status}' ({skipped} ignorado(s))."
+            )
+        )
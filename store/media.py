@@ -0,0 +1,100 @@
+"""
+Memoizacao das URLs dos arquivos de midia.
+
+`FieldFile.url` chama o storage (S3Boto3Storage em producao) a cada acesso e os
+templates acessam as imagens dos produtos varias vezes por pagina. As URLs sao guardadas
+por processo, indexadas por (model, campo, nome do arquivo). Como um arquivo novo sempre
+tem um nome novo (ou a mesma URL, quando sobrescrito), a chave nunca fica obsoleta entre
+processos; o `save` do model apenas descarta as URLs que nao serao mais usadas.
+"""
+
+import os
+from threading import Lock
+
+from .images import get_derivative_name
+
+MEDIA_URLS_MAX_SIZE = 4096
+
+_media_urls = {}
+_lock = Lock()
+
+
+def get_media_url(field, name):
+    """
+    Funcao que obtem a URL (memoizada) de um arquivo de um campo de arquivo.
+
+    Args:
+        field (django.db.models.FileField): O campo do model.
+        name (str): O nome do arquivo no storage do campo.
+
+    Returns:
+        url (str): A URL do arquivo ou "" se nao houver arquivo.
+    """
+    if not name:
+        return ""
+
+    key = (field.model._meta.label, field.name, name)
+    url = _media_urls.get(key)
+    if url is None:
+        url = field.storage.url(name)
+        with _lock:
+            if len(_media_urls) >= MEDIA_URLS_MAX_SIZE:
+                del _media_urls[next(iter(_media_urls))]  # oldest entry
+            _media_urls[key] = url
+    return url
+
+
+def invalidate_media_urls(model, names):
+    """
+    Funcao que descarta as URLs memoizadas de arquivos (e das derivadas) de um model.
+
+    Args:
+        model (django.db.models.Model): O model (ou instancia) dos arquivos.
+        names (iterable): Nomes dos arquivos.
+    """
+    label = model._meta.label
+    stems = tuple(os.path.splitext(name)[0] for name in names if name)
+    if not stems:
+        return
+    with _lock:
+        for key in [
+            key
+            for key in _media_urls
+            if key[0] == label and os.path.splitext(key[2])[0].startswith(stems)
+        ]:
+            del _media_urls[key]
+
+
+def clear_media_urls():
+    with _lock:
+        _media_urls.clear()
+
+
+def resolve_product_media_urls(products):
+    """
+    Funcao que resolve, de uma vez, as URLs das imagens (e derivadas) de uma lista de
+    produtos, de forma que a renderizacao da lista so leia URLs memoizadas.
+
+    Args:
+        products (iterable): Os produtos.
+
+    Returns:
+        products (list): Os produtos, ja avaliados.
+    """
+    products = list(products)
+    if not products:
+        return products
+
+    meta = products[0]._meta
+    main_image = meta.get_field("main_image")
+    nutritional_infos_image = meta.get_field("nutritional_infos_image")
+    for product in products:
+        get_media_url(main_image, product.main_image.name)
+        get_media_url(nutritional_infos_image, product.nutritional_infos_image.name)
+        for width in product.image_widths:
+            for extension in ("webp", "jpg"):
+                get_media_url(
+                    main_image,
+                    get_derivative_name(product.main_image.name, width, extension),
+                )
+    return products
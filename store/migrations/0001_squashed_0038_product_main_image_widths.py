@@ -0,0 +1,133 @@
+# Generated by Django 3.0.6 on 2026-10-19 03:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import store.models
+import store.validators
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('store', '0001_initial'), ('store', '0002_shippingaddress_neighborhood'), ('store', '0003_customer_gender'), ('store', '0004_auto_20200704_1340'), ('store', '0005_auto_20200705_2132'), ('store', '0006_product_description'), ('store', '0007_order_date_ordered_complete'), ('store', '0008_auto_20200714_2121'), ('store', '0009_auto_20200715_2228'), ('store', '0010_shippingaddress_main'), ('store', '0011_auto_20200721_2125'), ('store', '0012_auto_20200721_2127'), ('store', '0013_auto_20200721_2131'), ('store', '0014_auto_20200722_1813'), ('store', '0015_auto_20200727_1927'), ('store', '0016_auto_20200730_2140'), ('store', '0017_auto_20200730_2152'), ('store', '0018_auto_20200730_2156'), ('store', '0019_auto_20200731_1542'), ('store', '0020_auto_20200731_2212'), ('store', '0021_creditcard'), ('store', '0022_auto_20200803_1124'), ('store', '0023_auto_20200803_1724'), ('store', '0024_auto_20200804_2320'), ('store', '0025_auto_20200806_0002'), ('store', '0026_auto_20200806_0004'), ('store', '0027_auto_20200806_1358'), ('store', '0028_auto_20200812_0858'), ('store', '0029_auto_20200812_0907'), ('store', '0030_auto_20200812_1004'), ('store', '0031_auto_20200817_1111'), ('store', '0032_auto_20200817_1113'), ('store', '0033_auto_20200817_1129'), ('store', '0034_auto_20200817_1615'), ('store', '0035_auto_20200818_2317'), ('store', '0036_auto_20200818_2331'), ('store', '0037_auto_20200819_1057'), ('store', '0038_product_main_image_widths')]
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('first_name', models.CharField(blank=True, max_length=30, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('username', models.CharField(max_length=150, validators=[store.validators.CustomUnicodeUsernameValidator()], verbose_name='username')),
+                ('email', models.EmailField(error_messages={'unique': 'Email já cadastrado no sistema.'}, max_length=254, unique=True, verbose_name='email address')),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.Group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.Permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
+            },
+            managers=[
+                ('objects', store.models.CustomUserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cpf', models.CharField(max_length=14, null=True)),
+                ('phone', models.CharField(max_length=15)),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('gender', models.CharField(choices=[('MAS', 'Masculino'), ('FEM', 'Feminino')], max_length=9)),
+                ('birth_date', models.DateField(null=True)),
+                ('device', models.CharField(blank=True, max_length=200, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('main_image', models.ImageField(blank=True, null=True, upload_to='')),
+                ('description', models.TextField(null=True)),
+                ('nutritional_infos_image', models.ImageField(blank=True, null=True, upload_to='')),
+                ('main_image_widths', models.CharField(blank=True, default='', editable=False, max_length=50)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShippingAddress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zip_code', models.CharField(max_length=9)),
+                ('address', models.CharField(max_length=200)),
+                ('number', models.IntegerField()),
+                ('complement', models.CharField(blank=True, max_length=200)),
+                ('reference', models.CharField(blank=True, max_length=200)),
+                ('city', models.CharField(max_length=200)),
+                ('uf', models.CharField(choices=[('', 'Escolha um estado'), ('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'), ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('NS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'), ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], max_length=2)),
+                ('customer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.Customer')),
+                ('neighborhood', models.CharField(max_length=200)),
+                ('main', models.BooleanField(default=False)),
+                ('country', models.CharField(default='Brasil', max_length=6)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_type', models.CharField(choices=[('credit_card', 'Cartão de crédito'), ('paypal', 'PayPal'), ('bank_slip', 'Boleto bancário')], default=None, max_length=11)),
+                ('number_of_installments', models.IntegerField()),
+                ('value_of_installment', models.DecimalField(decimal_places=2, max_digits=7)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShippingService',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_code', models.CharField(choices=[('04014', 'SEDEX'), ('04510', 'PAC')], max_length=5, null=True)),
+                ('days_to_deliver', models.IntegerField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('_tracking_code', models.CharField(max_length=200, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('transaction_id', models.UUIDField(blank=True, null=True)),
+                ('customer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='store.Customer')),
+                ('shipping_address', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.ShippingAddress')),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.Payment')),
+                ('shipping_service', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.ShippingService')),
+                ('requested_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('analysing', 'Em análise'), ('requested', 'Aguardando pagamento'), ('payed', 'Pagamento confirmado'), ('preparing', 'Preparando pedido'), ('shipped', 'Pedido enviado')], default='analysing', max_length=9)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(blank=True, default=0, null=True)),
+                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='store.Order')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='store.Product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.6 on 2026-10-19 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0037_auto_20200819_1057'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='main_image_widths',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+    ]
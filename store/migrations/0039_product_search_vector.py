@@ -0,0 +1,51 @@
+# Generated by Django 3.0.6 on 2026-10-19 03:27
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_CONFIG_SQL = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$ BEGIN
+    CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+EXCEPTION WHEN unique_violation THEN NULL;
+END $$;
+ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+CREATE INDEX IF NOT EXISTS store_product_search_vector_gin
+    ON store_product USING gin (search_vector);
+UPDATE store_product SET search_vector =
+    setweight(to_tsvector('portuguese_unaccent', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('portuguese_unaccent', coalesce(description, '')), 'B');
+"""
+
+DROP_SEARCH_CONFIG_SQL = """
+DROP INDEX IF EXISTS store_product_search_vector_gin;
+DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent;
+"""
+
+
+def create_search_config(apps, schema_editor):
+    # SQLite uses the in-memory index of store.search instead
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_CONFIG_SQL)
+
+
+def drop_search_config(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_CONFIG_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0038_product_main_image_widths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_config, drop_search_config),
+    ]
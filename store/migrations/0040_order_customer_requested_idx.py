@@ -0,0 +1,17 @@
+# Generated by Django 3.0.6 on 2026-10-19 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0039_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-requested_at', '-id'], name='order_customer_requested_idx'),
+        ),
+    ]
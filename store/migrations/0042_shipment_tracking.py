@@ -0,0 +1,42 @@
+# Generated by Django 3.0.6 on 2026-10-19 03:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0041_orderstatuschange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shippingservice',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shippingservice',
+            name='tracking_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ShipmentEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=10)),
+                ('description', models.CharField(max_length=200)),
+                ('location', models.CharField(blank=True, default='', max_length=200)),
+                ('occurred_at', models.DateTimeField()),
+                ('shipping_service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.ShippingService')),
+            ],
+            options={
+                'ordering': ('-occurred_at',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shipmentevent',
+            constraint=models.UniqueConstraint(fields=('shipping_service', 'occurred_at', 'status'), name='unique_shipment_event'),
+        ),
+    ]
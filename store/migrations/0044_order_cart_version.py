@@ -0,0 +1,18 @@
+# Generated by Django 3.0.6 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0043_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='cart_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
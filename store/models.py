@@ -1,10 +1,14 @@
 from datetime import timedelta
 from decimal import Decimal
+import logging
 
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from .cart_cache import bump_cart_versions
 from .choices import (
     GENDERS,
     PAYMENT_TYPES,
@@ -12,8 +16,14 @@ from .choices import (
     ORDER_STATUSES,
     STATES,
 )
+from .images import generate_derivatives, get_derivative_name
+from .login_throttle import forget_unknown_email
+from .media import get_media_url, invalidate_media_urls
+from .search import remove_product_from_search_index, update_product_search_index
 from .validators import CustomUnicodeUsernameValidator
 
+logger = logging.getLogger(__name__)
+
 
 class CustomUserManager(BaseUserManager):
     """Classe para adequar as mudanças implementadas na classe CustomUser"""
@@ -68,6 +78,11 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return str(self.username)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # the email may have been cached as unknown by a failed login
+        forget_unknown_email(self.email)
+
 
 class Customer(models.Model):
     """Classe que define o cliente"""
@@ -94,25 +109,111 @@ class Product(models.Model):
     name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=7, decimal_places=2)
     main_image = models.ImageField(null=True, blank=True)
+    # widths of the responsive derivatives of main_image, e.g. "100,200,400"
+    main_image_widths = models.CharField(
+        max_length=50, blank=True, default="", editable=False
+    )
     nutritional_infos_image = models.ImageField(null=True, blank=True)
     description = models.TextField(null=True)
+    # name (weight A) + description (weight B), kept up to date by save(). Only filled
+    # (and GIN indexed, see migration 0039) on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+    # part of the ETag of the product page (see store.conditional)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
+
+    _loaded_main_image_name = ""
 
     def __str__(self):
         return str(self.name)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # None when the field was deferred: the image change can't be detected
+        if "main_image" in field_names:
+            instance._loaded_main_image_name = instance.__dict__["main_image"] or ""
+        else:
+            instance._loaded_main_image_name = None
+        return instance
+
+    def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Metodo que salva o produto, atualiza o indice de busca e gera as derivadas da
+        nova imagem principal
+        """
+        super().save(*args, **kwargs)
+        self.bump_cart_versions()  # the navbar cart shows name, price and image
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"name", "description"} & set(update_fields):
+            update_product_search_index(self)
+
+        name = self.main_image.name or ""
+        invalidate_media_urls(
+            self,
+            [name, self._loaded_main_image_name, self.nutritional_infos_image.name],
+        )
+        if self._loaded_main_image_name is None or name == self._loaded_main_image_name:
+            return
+
+        widths = []
+        if name:
+            try:
+                widths = generate_derivatives(name, self.main_image.storage)
+            except Exception:  # pylint: disable=broad-except
+                # the product is already saved: its pages use the original image until
+                # `regenerate_product_images --missing` generates them
+                logger.exception("Falha ao gerar as derivadas da imagem %s", name)
+        self.main_image_widths = ",".join(str(width) for width in widths)
+        # updated_at too: the srcset is in the ETag of the pages (store.conditional)
+        self.updated_at = timezone.now()
+        Product.objects.filter(pk=self.pk).update(
+            main_image_widths=self.main_image_widths, updated_at=self.updated_at
+        )
+        self.bump_cart_versions()  # the srcset of the navbar cart changed
+        self._loaded_main_image_name = name
+
+    def delete(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        pk = self.pk
+        # before: its order items are deleted with it (by the collector, not one by one)
+        self.bump_cart_versions()
+        result = super().delete(*args, **kwargs)
+        remove_product_from_search_index(pk)
+        return result
+
+    def bump_cart_versions(self):
+        """Metodo que invalida o carrinho em cache dos carrinhos com o produto"""
+        carts = Order.objects.filter(status="analysing", orderitem__product=self)
+        bump_cart_versions(carts)
+
     @property
     def image_url(self):
-        try:
-            return self.main_image.url
-        except ValueError:
-            return ""
+        return get_media_url(self._meta.get_field("main_image"), self.main_image.name)
+
+    @property
+    def image_widths(self):
+        return [int(width) for width in self.main_image_widths.split(",") if width]
+
+    def image_srcset(self, extension):
+        """
+        Metodo que obtem o valor do atributo `srcset` das derivadas da imagem principal.
+
+        Args:
+            extension (str): Extensao das derivadas ("webp" ou "jpg").
+        """
+        field, name = self._meta.get_field("main_image"), self.main_image.name
+        return ", ".join(
+            "{} {}w".format(
+                get_media_url(field, get_derivative_name(name, width, extension)), width
+            )
+            for width in self.image_widths
+        )
 
     @property
     def nutritional_infos_url(self):
-        try:
-            return self.nutritional_infos_image.url
-        except ValueError:
-            return ""
+        return get_media_url(
+            self._meta.get_field("nutritional_infos_image"),
+            self.nutritional_infos_image.name,
+        )
 
     @property
     def installments_without_interests(self):
@@ -193,6 +294,9 @@ class ShippingService(models.Model):
     service_code = models.CharField(max_length=5, choices=SHIPPING_SERVICES, null=True)
     price = models.DecimalField(max_digits=7, decimal_places=2)
     days_to_deliver = models.IntegerField()
+    # filled by the tracking poller (see store.shipment_tracking)
+    tracking_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    delivered_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return self.get_service_code_display()
@@ -237,6 +341,17 @@ class Order(models.Model):
     requested_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     transaction_id = models.UUIDField(null=True, blank=True)
+    # version of the navbar cart fragment cached for the order (see store.cart_cache)
+    cart_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the order history (see store.pagination)
+            models.Index(
+                fields=["customer", "-requested_at", "-id"],
+                name="order_customer_requested_idx",
+            ),
+        ]
 
     def __str__(self):
         return str(self.id)
@@ -284,6 +399,34 @@ class Order(models.Model):
         return self.payment.payment_type
 
 
+class OrderItemQuerySet(models.QuerySet):
+    """Classe que invalida o carrinho em cache dos pedidos alterados em lote"""
+
+    def _get_order_ids(self, **kwargs):
+        # read before the change, which can take the items out of the filter
+        order_ids = set(self.values_list("order_id", flat=True))
+        if "order" in kwargs or "order_id" in kwargs:
+            order = kwargs.get("order", kwargs.get("order_id"))
+            order_ids.add(getattr(order, "pk", order))
+        return order_ids
+
+    def update(self, **kwargs):
+        order_ids = self._get_order_ids(**kwargs)
+        rows = super().update(**kwargs)
+        bump_cart_versions(Order.objects.filter(pk__in=order_ids))
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        order_ids = self._get_order_ids()
+        result = super().delete()
+        bump_cart_versions(Order.objects.filter(pk__in=order_ids))
+        return result
+
+    delete.alters_data = True
+
+
 class OrderItem(models.Model):
     """Class que representa um item de uma ordem"""
 
@@ -291,6 +434,19 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True)
     quantity = models.IntegerField(default=0, null=True, blank=True)
 
+    objects = OrderItemQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """Metodo que salva o item e invalida o carrinho em cache do pedido"""
+        super().save(*args, **kwargs)
+        bump_cart_versions(Order.objects.filter(pk=self.order_id))
+
+    def delete(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        order_id = self.order_id
+        result = super().delete(*args, **kwargs)
+        bump_cart_versions(Order.objects.filter(pk=order_id))
+        return result
+
     @property
     def total(self):
         return self.product.price * self.quantity
@@ -298,3 +454,41 @@ class OrderItem(models.Model):
     @property
     def cash_total(self):
         return self.product.cash_price * self.quantity
+
+
+class OrderStatusChange(models.Model):
+    """Classe que define o registro (auditoria) de uma mudanca de status de um pedido"""
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE)
+    from_status = models.CharField(max_length=9, choices=ORDER_STATUSES)
+    to_status = models.CharField(max_length=9, choices=ORDER_STATUSES)
+    changed_at = models.DateTimeField()
+    changed_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class ShipmentEvent(models.Model):
+    """Classe que define um evento do rastreio de um servico de frete"""
+
+    shipping_service = models.ForeignKey(ShippingService, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10)
+    description = models.CharField(max_length=200)
+    location = models.CharField(max_length=200, blank=True, default="")
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ("-occurred_at",)
+        constraints = [
+            # the poller fetches the same events again until the delivery
+            models.UniqueConstraint(
+                fields=["shipping_service", "occurred_at", "status"],
+                name="unique_shipment_event",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.occurred_at:%d/%m/%Y %H:%M} {self.description}"
@@ -0,0 +1,115 @@
+"""
+Normalizacao, formatacao e validacao de identificadores brasileiros (CEP, CPF e telefone).
+
+A remocao das mascaras usa `bytes.translate`, que apaga os caracteres de mascara em C numa
+unica passada. Valores com outros caracteres (letras, acentos...) caem no caminho lento, uma
+expressao regular pre-compilada.
+"""
+
+import re
+
+from .validators import cpfs_are_valid
+
+MASK_CHARS = b" .-/()+"
+NON_DIGITS_REGEX = re.compile(r"[^0-9]+")
+CEP_REGEX = re.compile(r"^([0-9]{5})([0-9]{3})$")
+CPF_REGEX = re.compile(r"^([0-9]{3})([0-9]{3})([0-9]{3})([0-9]{2})$")
+PHONE_REGEX = re.compile(r"^([1-9]{2})(9?[0-9]{4})([0-9]{4})$")
+
+
+def only_digits(value):
+    """
+    Funcao que remove todos os caracteres que nao sao digitos de um valor.
+
+    Args:
+        value (str | None): O valor, possivelmente com mascara.
+
+    Returns:
+        digits (str | None): Apenas os digitos do valor ou None se o valor for None.
+    """
+    if value is None:
+        return None
+    try:
+        digits = value.encode("ascii").translate(None, MASK_CHARS)
+    except UnicodeEncodeError:
+        return NON_DIGITS_REGEX.sub("", value)
+    if digits.isdigit():
+        return digits.decode("ascii")
+    return NON_DIGITS_REGEX.sub("", digits.decode("ascii"))
+
+
+def only_digits_batch(values):
+    """Funcao que remove as mascaras de um lote de valores"""
+    return list(map(only_digits, values))
+
+
+def normalize_cep(value):
+    return only_digits(value)
+
+
+def cep_is_valid(value):
+    return CEP_REGEX.match(only_digits(value) or "") is not None
+
+
+def format_cep(value):
+    """Funcao que formata um CEP no padrao 00000-000 (valores invalidos sao mantidos)"""
+    match = CEP_REGEX.match(only_digits(value) or "")
+    if match is None:
+        return value
+    return "{}-{}".format(*match.groups())
+
+
+def normalize_cpf(value):
+    return only_digits(value)
+
+
+def format_cpf(value):
+    """Funcao que formata um CPF no padrao 000.000.000-00 (valores invalidos sao mantidos)"""
+    match = CPF_REGEX.match(only_digits(value) or "")
+    if match is None:
+        return value
+    return "{}.{}.{}-{}".format(*match.groups())
+
+
+def _remove_country_code(digits):
+    if digits and len(digits) in (12, 13) and digits.startswith("55"):
+        return digits[2:]
+    return digits
+
+
+def normalize_phone(value):
+    """Funcao que remove a mascara e o codigo do pais (+55) de um telefone"""
+    return _remove_country_code(only_digits(value))
+
+
+def phone_is_valid(value):
+    """Funcao que checa se um telefone (fixo ou celular) com DDD eh valido"""
+    return PHONE_REGEX.match(normalize_phone(value) or "") is not None
+
+
+def format_phone(value):
+    """
+    Funcao que formata um telefone no padrao (00) 00000-0000 ou (00) 0000-0000 (valores
+    invalidos sao mantidos)
+    """
+    match = PHONE_REGEX.match(normalize_phone(value) or "")
+    if match is None:
+        return value
+    return "({}) {}-{}".format(*match.groups())
+
+
+def normalize_ceps(values):
+    return only_digits_batch(values)
+
+
+def normalize_cpfs(values):
+    return only_digits_batch(values)
+
+
+def normalize_phones(values):
+    return list(map(_remove_country_code, only_digits_batch(values)))
+
+
+def validate_cpfs(values):
+    """Funcao que checa, em lote, se CPFs (com ou sem mascara) sao validos"""
+    return cpfs_are_valid([digits or "" for digits in only_digits_batch(values)])
@@ -0,0 +1,92 @@
+"""
+Maquina de estados do status dos pedidos (`choices.ORDER_STATUS_TRANSITIONS`).
+
+As transicoes sao aplicadas em lote: para cada status de origem, um unico
+`UPDATE ... WHERE status = <origem>`, de forma que pedidos que mudaram de status no meio
+tempo (ex.: outra acao do admin) sao ignorados em vez de sobrescritos. Cada pedido movido
+gera um `OrderStatusChange`, criados com um unico `bulk_create`.
+
+Carrinhos ("analysing") nunca sao movidos aqui: viram pedidos apenas no checkout, que
+cria o pagamento e o frete.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .choices import ORDER_FINAL_STATUSES, ORDER_STATUS_TRANSITIONS, ORDER_STATUSES
+from .models import Order, OrderStatusChange
+
+# the checkout owns the move out of it
+CART_STATUS = "analysing"
+
+
+class InvalidStatusTransition(ValueError):
+    pass
+
+
+def get_source_statuses(to_status):
+    """
+    Funcao que obtem os status a partir dos quais um pedido pode ir para `to_status`.
+
+    Args:
+        to_status (str): O status de destino.
+
+    Returns:
+        statuses (list): Os status de origem validos.
+    """
+    if to_status not in dict(ORDER_STATUSES):
+        raise InvalidStatusTransition(f"Status desconhecido: {to_status}")
+    return [
+        from_status
+        for from_status, to_statuses in ORDER_STATUS_TRANSITIONS.items()
+        if to_status in to_statuses and from_status != CART_STATUS
+    ]
+
+
+def transition_orders(orders, to_status, changed_by=None):
+    """
+    Funcao que move pedidos para um status, validando a transicao de cada um.
+
+    Args:
+        orders (QuerySet): Os pedidos.
+        to_status (str): O status de destino.
+        changed_by (CustomUser): O usuario que fez a mudanca, para a auditoria.
+
+    Returns:
+        result (tuple): Tupla (pedidos movidos, pedidos ignorados por nao poderem ir para
+            `to_status`).
+    """
+    from_statuses = get_source_statuses(to_status)
+    if not from_statuses:
+        raise InvalidStatusTransition(f"Nenhum pedido pode ir para {to_status}")
+
+    now = timezone.now()
+    values = {"status": to_status}
+    if to_status in ORDER_FINAL_STATUSES:
+        values["completed_at"] = now
+
+    changes = []
+    with transaction.atomic():
+        n_orders = orders.count()
+        for from_status in from_statuses:
+            to_move = Order.objects.filter(
+                pk__in=orders.order_by().values("pk"), status=from_status
+            )
+            # the audit trail needs the ids; the rows are locked so that the update
+            # below moves exactly these orders
+            moved_ids = list(to_move.select_for_update().values_list("pk", flat=True))
+            if not moved_ids:
+                continue
+            to_move.update(**values)
+            changes.extend(
+                OrderStatusChange(
+                    order_id=order_id,
+                    from_status=from_status,
+                    to_status=to_status,
+                    changed_at=now,
+                    changed_by=changed_by,
+                )
+                for order_id in moved_ids
+            )
+        OrderStatusChange.objects.bulk_create(changes, batch_size=500)
+    return len(changes), n_orders - len(changes)
@@ -0,0 +1,152 @@
+"""
+Paginacao por keyset (seek): a pagina seguinte eh buscada a partir dos valores das
+colunas de ordenacao do ultimo item da pagina atual (`WHERE (a, b) < (x, y)`), e nao com
+OFFSET, de forma que o custo de uma pagina nao cresce com a sua posicao na lista.
+
+Os cursores sao assinados (django.core.signing), logo nao podem ser forjados para
+consultas arbitrarias; um cursor invalido leva a primeira pagina.
+"""
+
+from django.core import signing
+from django.db.models import Q
+
+CATALOG_ORDERING = ("id",)
+CATALOG_PAGE_SIZE = 24
+ORDERS_ORDERING = ("-requested_at", "-id")
+ORDERS_PAGE_SIZE = 25
+
+CURSOR_SALT = "store.pagination"
+NEXT, PREVIOUS = "n", "p"
+
+
+class KeysetPage:
+    """Classe que define uma pagina da paginacao por keyset"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _get_key_values(obj, ordering):
+    values = []
+    for key in ordering:
+        value = getattr(obj, key.lstrip("-"))
+        values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    return values
+
+
+def encode_cursor(obj, ordering, direction):
+    return signing.dumps(
+        [direction, _get_key_values(obj, ordering)], salt=CURSOR_SALT, compress=True
+    )
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Funcao que decodifica um cursor.
+
+    Args:
+        cursor (str): O cursor.
+        model (django.db.models.Model): O model paginado.
+        ordering (tuple): Campos da ordenacao, com "-" para ordem decrescente.
+
+    Returns:
+        cursor (tuple): Tupla (direcao, valores dos campos) ou (None, None) se o cursor
+            for invalido.
+    """
+    try:
+        direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+        values = [
+            model._meta.get_field(key.lstrip("-")).to_python(value)
+            for key, value in zip(ordering, values)
+        ]
+    except (signing.BadSignature, TypeError, ValueError):
+        return None, None
+    if direction not in (NEXT, PREVIOUS) or len(values) != len(ordering):
+        return None, None
+    return direction, values
+
+
+def _get_seek_filter(ordering, values, forward):
+    """
+    Funcao que monta o filtro dos itens depois (ou antes) de uma posicao da ordenacao,
+    ex.: para ("-requested_at", "-id"): requested_at < x OU (requested_at = x E id < y).
+    """
+    seek_filter, equal = Q(), {}
+    for key, value in zip(ordering, values):
+        field = key.lstrip("-")
+        lookup = "lt" if key.startswith("-") == forward else "gt"
+        seek_filter |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+    return seek_filter
+
+
+def _reverse_ordering(ordering):
+    return tuple(key[1:] if key.startswith("-") else f"-{key}" for key in ordering)
+
+
+def paginate_keyset(queryset, ordering, cursor, page_size):
+    """
+    Funcao que obtem uma pagina de um queryset pela posicao de um cursor.
+
+    Args:
+        queryset (QuerySet): Os objetos a serem paginados.
+        ordering (tuple): Campos da ordenacao, com "-" para ordem decrescente. Devem
+            identificar unicamente cada objeto (ex.: terminar com o id), nao ser nulos e
+            ter um indice correspondente.
+        cursor (str): O cursor recebido na requisicao ou None para a primeira pagina.
+        page_size (int): O tamanho da pagina.
+
+    Returns:
+        page (KeysetPage): A pagina, com os cursores da pagina seguinte e anterior.
+    """
+    direction, values = (
+        decode_cursor(cursor, queryset.model, ordering) if cursor else (None, None)
+    )
+    forward = direction != PREVIOUS
+
+    queryset = queryset.order_by(
+        *(ordering if forward else _reverse_ordering(ordering))
+    )
+    if values is not None:
+        queryset = queryset.filter(_get_seek_filter(ordering, values, forward))
+
+    # one extra row tells whether there is a page after this one
+    objects = list(queryset[: page_size + 1])
+    has_more = len(objects) > page_size
+    objects = objects[:page_size]
+    if not forward:
+        objects.reverse()
+    if not objects:
+        return KeysetPage(objects)
+
+    if forward:
+        has_next, has_previous = has_more, values is not None
+    else:
+        has_next, has_previous = True, has_more
+    return KeysetPage(
+        objects,
+        next_cursor=encode_cursor(objects[-1], ordering, NEXT) if has_next else None,
+        previous_cursor=(
+            encode_cursor(objects[0], ordering, PREVIOUS) if has_previous else None
+        ),
+    )
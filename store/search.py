@@ -0,0 +1,248 @@
+"""
+Busca textual de produtos (nome e descricao).
+
+No PostgreSQL a busca usa a coluna `Product.search_vector` (tsvector com indice GIN) na
+configuracao `portuguese_unaccent`, criadas na migracao 0039. Nos demais bancos (SQLite
+em desenvolvimento) usa um indice invertido em memoria, construido na primeira busca e
+atualizado a cada `Product.save`; o indice eh por processo, o que basta para o servidor
+de desenvolvimento.
+
+Nos dois casos a busca ignora acentos e caixa, todos os termos devem ocorrer (como
+prefixo, ex.: "amend" encontra "amendoim") e o nome pesa mais que a descricao.
+"""
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+from collections.abc import Sequence
+import math
+import re
+from threading import Lock
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F
+
+SEARCH_CONFIG = "portuguese_unaccent"
+# same proportion as the default weights of the postgres ranking (A=1.0, B=0.4)
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+SEARCH_PAGE_SIZE = 12
+
+STOP_WORDS = frozenset(
+    (
+        "a o e as os ao aos da de do das dos em na no nas nos "
+        "um uma por para com que se"
+    ).split()
+)
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Funcao que separa um texto em termos sem acentos, em caixa baixa e sem stop words.
+
+    Args:
+        text (str): O texto.
+
+    Returns:
+        tokens (list): Os termos, na ordem do texto.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return [token for token in TOKEN_RE.findall(text) if token not in STOP_WORDS]
+
+
+def _stem(token):
+    # crude plural folding, so "pastas" and "pasta" share the same entry
+    return token[:-1] if len(token) > 3 and token.endswith("s") else token
+
+
+class ProductSearchIndex:
+    """Classe que define o indice invertido em memoria dos produtos"""
+
+    def __init__(self):
+        self.loaded = False
+        self._postings = defaultdict(dict)  # term -> {pk: weight}
+        self._terms = []  # sorted, for the prefix lookups
+        self._documents = {}  # pk -> terms
+        self._lock = Lock()
+
+    def load(self, rows):
+        """
+        Metodo que (re)constroi o indice.
+
+        Args:
+            rows (iterable): Tuplas (pk, nome, descricao).
+        """
+        with self._lock:
+            self._postings.clear()
+            self._terms.clear()
+            self._documents.clear()
+            for pk, name, description in rows:
+                self._add(pk, name, description)
+            self.loaded = True
+
+    def update(self, pk, name, description):
+        with self._lock:
+            self._remove(pk)
+            self._add(pk, name, description)
+
+    def remove(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def _add(self, pk, name, description):
+        weights = defaultdict(float)
+        for token in tokenize(name):
+            weights[_stem(token)] += NAME_WEIGHT
+        for token in tokenize(description):
+            weights[_stem(token)] += DESCRIPTION_WEIGHT
+
+        for term, weight in weights.items():
+            if term not in self._postings:
+                insort(self._terms, term)
+            self._postings[term][pk] = weight
+        self._documents[pk] = list(weights)
+
+    def _remove(self, pk):
+        for term in self._documents.pop(pk, ()):
+            postings = self._postings[term]
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def _prefixed_terms(self, prefix):
+        index = bisect_left(self._terms, prefix)
+        while index < len(self._terms) and self._terms[index].startswith(prefix):
+            yield self._terms[index]
+            index += 1
+
+    def search(self, query):
+        """
+        Metodo que busca os produtos que contem todos os termos da busca.
+
+        Args:
+            query (str): A busca.
+
+        Returns:
+            pks (list): As pks dos produtos, da maior para a menor relevancia.
+        """
+        terms = [_stem(token) for token in tokenize(query)]
+        if not terms:
+            return []
+
+        scores = None
+        with self._lock:
+            n_documents = len(self._documents)
+            for term in terms:
+                term_scores = {}
+                for indexed_term in self._prefixed_terms(term):
+                    postings = self._postings[indexed_term]
+                    idf = math.log(1 + n_documents / len(postings))
+                    for pk, weight in postings.items():
+                        term_scores[pk] = max(term_scores.get(pk, 0), weight * idf)
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        pk: score + term_scores[pk]
+                        for pk, score in scores.items()
+                        if pk in term_scores
+                    }
+                if not scores:
+                    return []
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+class RankedProducts(Sequence):
+    """
+    Classe que define o resultado da busca no indice em memoria. So os produtos da fatia
+    acessada (ex.: a pagina do `Paginator`) sao buscados no banco.
+    """
+
+    def __init__(self, queryset, pks):
+        self._queryset = queryset
+        self._pks = pks
+
+    def __len__(self):
+        return len(self._pks)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            index = index + len(self) if index < 0 else index
+            return self[index : index + 1][0]
+        pks = self._pks[index]
+        products = self._queryset.in_bulk(pks)
+        return [products[pk] for pk in pks if pk in products]
+
+
+_index = ProductSearchIndex()
+
+
+def get_search_vector():
+    return SearchVector("name", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "description", weight="B", config=SEARCH_CONFIG
+    )
+
+
+def _uses_postgres(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def search_products(queryset, query):
+    """
+    Funcao que busca produtos pelo nome e descricao.
+
+    Args:
+        queryset (QuerySet): Os produtos onde buscar.
+        query (str): A busca.
+
+    Returns:
+        products (QuerySet or RankedProducts): Os produtos encontrados, do mais para o
+            menos relevante. Ambos podem ser paginados com o `Paginator`.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    if _uses_postgres(queryset):
+        search_query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            config=SEARCH_CONFIG,
+            search_type="raw",
+        )
+        return (
+            queryset.annotate(rank=SearchRank(F("search_vector"), search_query))
+            .filter(search_vector=search_query)
+            .order_by("-rank", "pk")
+        )
+
+    if not _index.loaded:
+        _index.load(
+            queryset.model._default_manager.using(queryset.db).values_list(
+                "pk", "name", "description"
+            )
+        )
+    return RankedProducts(queryset, _index.search(query))
+
+
+def update_product_search_index(product):
+    """
+    Funcao que atualiza a entrada de um produto (ja salvo) no indice de busca.
+
+    Args:
+        product (Product): O produto.
+    """
+    queryset = type(product)._default_manager.using(product._state.db)
+    if _uses_postgres(queryset):
+        queryset.filter(pk=product.pk).update(search_vector=get_search_vector())
+    elif _index.loaded:
+        _index.update(product.pk, product.name, product.description)
+
+
+def remove_product_from_search_index(pk):
+    if _index.loaded:
+        _index.remove(pk)
@@ -0,0 +1,135 @@
+"""
+Poller do rastreio dos pedidos enviados.
+
+Os codigos de rastreio dos pedidos enviados e ainda nao entregues sao agrupados em
+lotes (uma requisicao por lote, ver store.carriers) e as requisicoes sao feitas em
+paralelo, limitadas por um semaforo. Os eventos sao gravados em `ShipmentEvent`, de
+onde as paginas os leem: nenhuma pagina consulta a transportadora.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from PeanutButter.replicas import replica_reads
+
+from .carriers import get_tracking_backend
+from .models import ShipmentEvent, ShippingService
+
+logger = logging.getLogger(__name__)
+
+
+def get_pending_shipments():
+    """Funcao que obtem {codigo de rastreio: pk} dos servicos de frete a rastrear"""
+    return dict(
+        ShippingService.objects.filter(
+            order__status="shipped",
+            _tracking_code__isnull=False,
+            delivered_at__isnull=True,
+        ).values_list("_tracking_code", "pk")
+    )
+
+
+async def fetch_batches(backend, batches, concurrency):
+    """
+    Funcao que consulta os lotes de codigos com no maximo `concurrency` requisicoes
+    simultaneas. Os backends sao sincronos (requests), logo cada requisicao roda em uma
+    thread do pool.
+
+    Returns:
+        results (list): Tuplas (lote, eventos por codigo ou None, erro ou None).
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def fetch(batch):
+            async with semaphore:
+                try:
+                    events = await loop.run_in_executor(executor, backend.track, batch)
+                except Exception as error:  # pylint: disable=broad-except
+                    return batch, None, error
+                return batch, events, None
+
+        return await asyncio.gather(*(fetch(batch) for batch in batches))
+
+
+def save_events(shipments, events_by_code):
+    """
+    Funcao que grava os eventos novos e marca os servicos de frete entregues.
+
+    Args:
+        shipments (dict): {codigo de rastreio: pk do servico de frete}.
+        events_by_code (dict): {codigo de rastreio: lista de eventos}.
+
+    Returns:
+        delivered (int): Numero de servicos de frete entregues.
+    """
+    now = timezone.now()
+    events, delivered = [], {}
+    for code, code_events in events_by_code.items():
+        if code not in shipments:
+            continue
+        for event in code_events:
+            events.append(
+                ShipmentEvent(
+                    shipping_service_id=shipments[code],
+                    status=event["status"],
+                    description=event["description"][:200],
+                    location=event["location"][:200],
+                    occurred_at=event["occurred_at"],
+                )
+            )
+            if event["delivered"]:
+                delivered[shipments[code]] = event["occurred_at"]
+
+    with transaction.atomic():
+        # events already stored by previous polls violate the unique constraint
+        ShipmentEvent.objects.bulk_create(events, batch_size=500, ignore_conflicts=True)
+        ShippingService.objects.filter(
+            pk__in=[shipments[code] for code in events_by_code if code in shipments]
+        ).update(tracking_updated_at=now)
+        services = list(ShippingService.objects.filter(pk__in=delivered).only("pk"))
+        for service in services:
+            service.delivered_at = delivered[service.pk]
+        ShippingService.objects.bulk_update(services, ["delivered_at"])
+    return len(services)
+
+
+def poll_shipments(backend=None, batch_size=None, concurrency=4):
+    """
+    Funcao que atualiza o rastreio de todos os pedidos enviados e nao entregues.
+
+    Args:
+        backend: O backend de rastreio. Padrao: `settings.TRACKING_BACKEND`.
+        batch_size (int): Codigos por requisicao. Padrao: o maximo do backend.
+        concurrency (int): Numero maximo de requisicoes simultaneas.
+
+    Returns:
+        result (tuple): Tupla (codigos consultados, entregues, lotes com erro).
+    """
+    backend = backend or get_tracking_backend()
+    batch_size = min(batch_size or backend.max_batch_size, backend.max_batch_size)
+
+    # a shipment that hasn't reached the replica yet is picked up by the next poll
+    with replica_reads():
+        shipments = get_pending_shipments()
+    codes = list(shipments)
+    batches = [codes[i : i + batch_size] for i in range(0, len(codes), batch_size)]
+    if not batches:
+        return 0, 0, 0
+
+    events_by_code, errors = {}, 0
+    for batch, events, error in asyncio.run(
+        fetch_batches(backend, batches, concurrency)
+    ):
+        if error is not None:
+            errors += 1
+            logger.warning("Falha ao rastrear %s codigos: %s", len(batch), error)
+            continue
+        events_by_code.update(events)
+    return len(codes), save_events(shipments, events_by_code), errors
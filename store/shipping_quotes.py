@@ -0,0 +1,204 @@
+"""
+Cotacoes de frete dos Correios, em cache.
+
+O preco e o prazo dependem apenas do CEP de destino e do servico (o pacote eh sempre o
+mesmo), entao cada cotacao fica no cache por `settings.SHIPPING_QUOTE_TIMEOUT`. Quando
+um cliente logado abre o carrinho, as cotacoes dos seus enderecos (o principal e os mais
+recentes) sao pedidas em segundo plano, e no checkout saem do cache, sem esperar os
+Correios. Uma cotacao ja em andamento nao eh pedida de novo: quem precisa dela espera a
+mesma requisicao (uma ainda na fila eh cancelada e feita na hora).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .choices import PAC, SEDEX
+from .models import ShippingAddress
+from .normalizers import normalize_cep
+
+logger = logging.getLogger(__name__)
+
+QUOTE_KEY = "shipping_quote:{}:{}"
+# seconds to wait for the Correios web service
+REQUEST_TIMEOUT = 10
+
+
+def request_quote(zip_code, service_code):
+    """
+    Funcao que consulta o preco e o prazo de um servico de frete nos Correios.
+
+    Args:
+        zip_code (str): O CEP do destinatario, apenas digitos.
+        service_code (str): O codigo do servico (PAC ou SEDEX).
+
+    Returns:
+        quote (dict): Os campos Valor, PrazoEntrega, Erro e MsgErro da resposta.
+    """
+    url = "http://ws.correios.com.br/calculador/CalcPrecoPrazo.aspx?"
+    url += urlencode(
+        {
+            "sCepOrigem": 88037310,
+            "sCepDestino": zip_code,
+            "nVlPeso": 1,
+            "nCdFormato": 1,
+            "nVlComprimento": 30,
+            "nVlAltura": 20,
+            "nVlLargura": 20,
+            "sCdMaoPropria": "n",
+            "nVlValorDeclarado": 0,
+            "sCdAvisoRecebimento": "n",
+            "nCdServico": service_code,
+            "nVlDiametro": 0,
+            "StrRetorno": "xml",
+            "nIndicaCalculo": 3,
+        }
+    )
+
+    # imported on first use, not on every worker boot (see report_import_times)
+    from defusedxml import ElementTree
+    import requests
+
+    tree = ElementTree.fromstring(requests.get(url, timeout=REQUEST_TIMEOUT).text)
+    return {
+        "Valor": tree.find("cServico").findtext("Valor"),
+        "PrazoEntrega": tree.find("cServico").findtext("PrazoEntrega"),
+        "Erro": tree.find("cServico").findtext("Erro"),
+        "MsgErro": tree.find("cServico").findtext("MsgErro"),
+    }
+
+
+def fetch_quote(zip_code, service_code):
+    """Funcao que consulta uma cotacao nos Correios e a guarda no cache"""
+    quote = request_quote(zip_code, service_code)
+    # failures (e.g. the service is unavailable) come without a price and are retried
+    if quote["Valor"] not in (None, "", "0,00"):
+        cache.set(
+            QUOTE_KEY.format(zip_code, service_code),
+            quote,
+            timeout=settings.SHIPPING_QUOTE_TIMEOUT,
+        )
+    return quote
+
+
+class QuotePrefetcher:
+    """
+    Classe que consulta as cotacoes em threads do processo, uma vez por chave enquanto
+    a consulta estiver em andamento.
+    """
+
+    def __init__(self):
+        # reentrant: a future that is already done runs its callback in submit()
+        self.lock = threading.RLock()
+        self.executor = None
+        self.pid = None
+        self.pending = {}
+
+    def get_executor(self):
+        # threads don't survive a fork (gunicorn --preload), so each process has its own
+        if self.pid != os.getpid():
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.SHIPPING_QUOTE_PREFETCH_WORKERS,
+                thread_name_prefix="shipping-quotes",
+            )
+            self.pid = os.getpid()
+            self.pending = {}
+        return self.executor
+
+    def get_pending(self, key):
+        with self.lock:
+            return self.pending.get(key) if self.pid == os.getpid() else None
+
+    def submit(self, key, zip_code, service_code):
+        with self.lock:
+            executor = self.get_executor()
+            # past the cap (Correios slow or down) new prefetches are dropped: they
+            # would only be fetched after the customer needed them
+            if (
+                key not in self.pending
+                and len(self.pending) < settings.SHIPPING_QUOTE_PREFETCH_MAX_PENDING
+            ):
+                future = executor.submit(self.fetch, zip_code, service_code)
+                self.pending[key] = future
+                future.add_done_callback(lambda _: self.done(key))
+
+    def done(self, key):
+        with self.lock:
+            self.pending.pop(key, None)
+
+    @staticmethod
+    def fetch(zip_code, service_code):
+        try:
+            return fetch_quote(zip_code, service_code)
+        except Exception:  # pylint: disable=broad-except
+            logger.warning(
+                "Falha ao cotar o frete %s para %s",
+                service_code,
+                zip_code,
+                exc_info=True,
+            )
+            return None
+
+
+prefetcher = QuotePrefetcher()
+
+
+def get_shipping_quote(zip_code, service_code):
+    """
+    Funcao que obtem a cotacao de um servico de frete: do cache, da consulta ja em
+    andamento ou, por fim, dos Correios.
+
+    Args:
+        zip_code (str): O CEP do destinatario.
+        service_code (str): O codigo do servico (PAC ou SEDEX).
+
+    Returns:
+        quote (dict): Os campos Valor, PrazoEntrega, Erro e MsgErro da resposta.
+    """
+    zip_code = normalize_cep(str(zip_code))
+    key = QUOTE_KEY.format(zip_code, service_code)
+    quote = cache.get(key)
+    if quote is None:
+        future = prefetcher.get_pending(key)
+        # only a request already running is waited on; a queued one (behind other
+        # prefetches) is cancelled and made here
+        if future is not None and (future.running() or not future.cancel()):
+            quote = future.result()
+    if quote is None:
+        quote = fetch_quote(zip_code, service_code)
+    return quote
+
+
+def prefetch_quotes(zip_codes):
+    """
+    Funcao que pede em segundo plano as cotacoes (PAC e SEDEX) que ainda nao estao no
+    cache.
+
+    Args:
+        zip_codes (list): Os CEPs, em ordem de prioridade.
+    """
+    # in order: the main address is fetched first
+    keys = {
+        QUOTE_KEY.format(zip_code, service_code): (zip_code, service_code)
+        for zip_code in dict.fromkeys(
+            normalize_cep(str(zip_code)) for zip_code in zip_codes
+        )
+        for service_code in (PAC, SEDEX)
+    }
+    cached = cache.get_many(keys)
+    for key, (zip_code, service_code) in keys.items():
+        if key not in cached:
+            prefetcher.submit(key, zip_code, service_code)
+
+
+def prefetch_customer_quotes(customer):
+    """Funcao que pede as cotacoes do endereco principal e dos ultimos do cliente"""
+    zip_codes = ShippingAddress.objects.filter(customer=customer).order_by(
+        "-main", "-id"
+    )[: settings.SHIPPING_QUOTE_PREFETCH_ADDRESSES]
+    prefetch_quotes(zip_codes.values_list("zip_code", flat=True))
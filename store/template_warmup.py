@@ -0,0 +1,63 @@
+"""
+Compilacao antecipada dos templates da loja.
+
+Com o loader em cache (fora do DEBUG) cada template eh compilado na primeira vez que eh
+usado em cada processo, ou seja, na primeira requisicao de cada pagina em cada worker.
+`warm_templates` compila todos os templates de `store/templates` quando a aplicacao
+WSGI/ASGI sobe, antes da primeira requisicao.
+"""
+
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger(__name__)
+
+
+def get_templates_dir():
+    return os.path.join(apps.get_app_config("store").path, "templates")
+
+
+def get_template_names():
+    """Funcao que lista os nomes (ex.: "store/cart.html") dos templates da loja"""
+    templates_dir = get_templates_dir()
+    names = []
+    for root, _, files in os.walk(templates_dir):
+        for file in files:
+            path = os.path.relpath(os.path.join(root, file), templates_dir)
+            names.append(path.replace(os.sep, "/"))
+    return sorted(names)
+
+
+def uses_cached_loader(engine):
+    return any(
+        isinstance(loader, CachedLoader) for loader in engine.engine.template_loaders
+    )
+
+
+def warm_templates():
+    """
+    Funcao que compila os templates da loja no cache do loader. Sem o loader em cache
+    (DEBUG) nao faz nada, ja que os templates seriam compilados de novo a cada uso.
+
+    Returns:
+        compiled (int): Numero de templates compilados.
+    """
+    engine = engines["django"]
+    if not uses_cached_loader(engine):
+        return 0
+
+    start = time.perf_counter()
+    names = get_template_names()
+    for name in names:
+        engine.get_template(name)
+    logger.info(
+        "%s templates compilados em %.1fms",
+        len(names),
+        (time.perf_counter() - start) * 1000,
+    )
+    return len(names)
@@ -1,5 +1,9 @@
 from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
 from django.template.defaultfilters import stringfilter
+from django.templatetags.static import static
+from django.utils.html import format_html_join
 
 register = template.Library()
 
@@ -31,3 +35,37 @@ def bank_slip_discount(value):
 @stringfilter
 def remove_brand_name(text):
     return text.split("Helga's ")[-1]
+
+
+@register.inclusion_tag("store/responsive_image.html")
+def responsive_image(product, sizes="100vw", css_class=""):
+    """
+    Tag que renderiza a imagem principal de um produto com as derivadas responsivas (WebP com
+    fallback para JPEG) em `srcset`. Sem derivadas, renderiza apenas a imagem original.
+    """
+    return {
+        "src": product.image_url,
+        "alt": product.name,
+        "sizes": sizes,
+        "css_class": css_class,
+        "webp_srcset": product.image_srcset("webp"),
+        "jpeg_srcset": product.image_srcset("jpg"),
+    }
+
+
+@register.simple_tag
+def static_bundle(name):
+    """
+    Tag que renderiza o <script> (ou <link>) de um bundle de `settings.STATIC_BUNDLES`. Em
+    desenvolvimento (ou sem um storage que gere os bundles) renderiza os arquivos de origem.
+    """
+    if settings.DEBUG or not hasattr(staticfiles_storage, "build_bundles"):
+        names = settings.STATIC_BUNDLES[name]
+    else:
+        names = [name]
+
+    if name.endswith(".css"):
+        html = '<link rel="stylesheet" type="text/css" href="{}">'
+    else:
+        html = '<script type="text/javascript" src="{}"></script>'
+    return format_html_join("\n", html, ((static(name),) for name in names))
@@ -0,0 +1,163 @@
+"""
+Importacao em lote dos codigos de rastreio do arquivo de postagem da transportadora.
+
+O arquivo eh um CSV que associa o pedido (coluna `pedido`, com o id, ou `transacao`, com
+o transaction_id) ao codigo de rastreio (coluna `rastreio`). Cada lote de linhas custa
+uma consulta dos pedidos, um `bulk_update` dos `ShippingService` e a transicao em lote
+dos pedidos para `shipped` (ver store.order_status).
+"""
+
+from itertools import islice
+import re
+from uuid import UUID
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Order, ShippingService
+from .order_status import transition_orders
+
+ORDER_COLUMNS = ("pedido", "order_id")
+TRANSACTION_COLUMNS = ("transacao", "transaction_id")
+TRACKING_CODE_COLUMNS = ("rastreio", "codigo_rastreio", "tracking_code")
+# Correios: two letters, eight digits + check digit, origin country, e.g. "PN123456789BR"
+TRACKING_CODE_RE = re.compile(r"^[A-Z]{2}\d{9}[A-Z]{2}$")
+
+
+def _find_column(fieldnames, aliases):
+    return next((column for column in aliases if column in fieldnames), None)
+
+
+def get_columns(fieldnames):
+    """
+    Funcao que identifica as colunas do arquivo de postagem.
+
+    Args:
+        fieldnames (list): O cabecalho do CSV.
+
+    Returns:
+        columns (tuple): Tupla (coluna do pedido, coluna da transacao, coluna do codigo).
+            As colunas ausentes sao None.
+
+    Raises:
+        ValueError: Se o arquivo nao tiver a coluna do codigo ou nenhuma do pedido.
+    """
+    fieldnames = fieldnames or []
+    columns = (
+        _find_column(fieldnames, ORDER_COLUMNS),
+        _find_column(fieldnames, TRANSACTION_COLUMNS),
+        _find_column(fieldnames, TRACKING_CODE_COLUMNS),
+    )
+    if columns[2] is None or columns[0] is columns[1] is None:
+        raise ValueError(
+            "O arquivo deve conter as colunas 'rastreio' e 'pedido' ou 'transacao'"
+        )
+    return columns
+
+
+def _parse_row(row, columns):
+    order_column, transaction_column, code_column = columns
+    code = re.sub(r"\s", "", row.get(code_column) or "").upper()
+    if not TRACKING_CODE_RE.match(code):
+        raise ValueError("Código de rastreio inválido")
+
+    order_id = (row.get(order_column) or "").strip() if order_column else ""
+    transaction_id = (
+        (row.get(transaction_column) or "").strip() if transaction_column else ""
+    )
+    if order_id:
+        if not order_id.isdigit():
+            raise ValueError("Pedido inválido")
+        return ("pk", int(order_id)), code
+    if transaction_id:
+        try:
+            return ("transaction_id", UUID(transaction_id)), code
+        except ValueError:
+            raise ValueError("Transação inválida") from None
+    raise ValueError("Pedido não informado")
+
+
+def import_chunk(chunk, columns, seen_order_ids, changed_by=None):
+    """
+    Funcao que importa um lote de linhas do arquivo de postagem.
+
+    Args:
+        chunk (list): As linhas (dicts) do CSV.
+        columns (tuple): As colunas, como retornadas por `get_columns`.
+        seen_order_ids (set): Pedidos ja vistos no arquivo, atualizado pela funcao.
+        changed_by (CustomUser): O usuario da importacao, para a auditoria dos status.
+
+    Returns:
+        result (tuple): Tupla (codigos atualizados, pedidos enviados, lista de tuplas
+            (linha, motivo) das linhas rejeitadas).
+    """
+    parsed, rejected = [], []
+    for row in chunk:
+        try:
+            key, code = _parse_row(row, columns)
+        except ValueError as error:
+            rejected.append((row, str(error)))
+            continue
+        parsed.append((row, key, code))
+
+    orders = {}
+    keys = {"pk": [], "transaction_id": []}
+    for _, (field, value), _ in parsed:
+        keys[field].append(value)
+    for pk, transaction_id, shipping_service_id in Order.objects.filter(
+        Q(pk__in=keys["pk"]) | Q(transaction_id__in=keys["transaction_id"])
+    ).values_list("pk", "transaction_id", "shipping_service_id"):
+        orders[("pk", pk)] = orders[("transaction_id", transaction_id)] = (
+            pk,
+            shipping_service_id,
+        )
+
+    tracking_codes, order_ids = {}, []
+    for row, key, code in parsed:
+        if key not in orders:
+            rejected.append((row, "Pedido não encontrado"))
+            continue
+        pk, shipping_service_id = orders[key]
+        if shipping_service_id is None:
+            rejected.append((row, "Pedido sem serviço de frete"))
+            continue
+        if pk in seen_order_ids:
+            rejected.append((row, "Pedido repetido no arquivo"))
+            continue
+        seen_order_ids.add(pk)
+        tracking_codes[shipping_service_id] = code
+        order_ids.append(pk)
+
+    with transaction.atomic():
+        ShippingService.objects.bulk_update(
+            [
+                ShippingService(pk=pk, _tracking_code=code)
+                for pk, code in tracking_codes.items()
+            ],
+            ["_tracking_code"],
+        )
+        shipped, _ = transition_orders(
+            Order.objects.filter(pk__in=order_ids), "shipped", changed_by=changed_by
+        )
+    return len(tracking_codes), shipped, rejected
+
+
+def import_tracking_codes(reader, chunk_size=1000, changed_by=None):
+    """
+    Funcao que importa um arquivo de postagem inteiro, lote a lote.
+
+    Args:
+        reader (csv.DictReader): O leitor do CSV.
+        chunk_size (int): O numero de linhas por lote.
+        changed_by (CustomUser): O usuario da importacao, para a auditoria dos status.
+
+    Yields:
+        result (tuple): O resultado de `import_chunk` de cada lote.
+    """
+    columns = get_columns(reader.fieldnames)
+    seen_order_ids = set()
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield import_chunk(chunk, columns, seen_order_ids, changed_by=changed_by)
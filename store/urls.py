@@ -4,6 +4,7 @@ from . import views
 
 urlpatterns = [
     path("", views.store, name="store"),
+    path("search/", views.search, name="search"),
     path("cart/", views.cart, name="cart"),
     path("checkout/", views.checkout, name="checkout"),
     path(
@@ -37,12 +38,22 @@ urlpatterns = [
         "user_page/register_address/", views.register_address, name="register_address"
     ),
     path("get_shipping_infos/", views.get_shipping_infos, name="get_shipping_infos"),
+    path(
+        "get_zip_code_infos/<zip_code>/",
+        views.get_zip_code_infos,
+        name="get_zip_code_infos",
+    ),
     path("order/success/<transaction_id>", views.order_success, name="order_success"),
     path(
         "load_credit_card_installments/",
         views.load_credit_card_installments,
         name="load_credit_card_installments",
     ),
+    path(
+        "upload_tracking_codes/",
+        views.upload_tracking_codes,
+        name="upload_tracking_codes",
+    ),
     path("remove_item/", views.remove_item, name="remove_item"),
     path("remove_address/", views.remove_address, name="remove_address"),
 ]
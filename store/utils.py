@@ -1,14 +1,11 @@
 from decimal import Decimal
-from urllib.parse import urlencode
 from uuid import uuid4
 
-from defusedxml import ElementTree
-import requests
-
 from django.contrib.auth import login
 from django.shortcuts import redirect, render
 from django.utils import timezone
 
+from .customers import provision_customer
 from .forms import (
     CustomerCreationForm,
     CustomUserCreationForm,
@@ -16,7 +13,7 @@ from .forms import (
     PaymentForm,
     ShippingAddressForm,
 )
-from .helpers import exclude_mask_chars, get_installment_options
+from .helpers import get_installment_options
 from .models import (
     Customer,
     Order,
@@ -24,6 +21,7 @@ from .models import (
     ShippingAddress,
     ShippingService,
 )
+from .shipping_quotes import get_shipping_quote
 
 
 def get_context(request):
@@ -33,11 +31,9 @@ def get_context(request):
     try:
         customer = request.user.customer
     except Customer.DoesNotExist:
-        customer, _ = Customer.objects.get_or_create(
-            device=request.COOKIES.get("device", uuid4()),
-        )
-        customer.user = request.user  # social login
-        customer.save()
+        # social logins get their customer at login (store.customers); this only covers
+        # users without one, e.g. logged in before that or created in the admin
+        customer = provision_customer(request.user, request.COOKIES.get("device"))
         context["delete_cookie"] = True
     except AttributeError:
         customer, _ = Customer.objects.get_or_create(
@@ -48,6 +44,7 @@ def get_context(request):
     order, _ = Order.objects.get_or_create(customer=customer, status="analysing")
     context["order"] = order
     items = order.orderitem_set.all().order_by("id")
+    # the navbar cart is cached under order.cart_version: items is only read on a miss
     context["items"] = items
     return context
 
@@ -57,7 +54,7 @@ def create_shipping_service_and_payment(request, order, zip_code):
     payment_type = request.POST["payment_form-payment_type"]
     shipping_service_code = request.POST["shipping_services_form-service"]
 
-    shipping_infos = _get_shipping_infos(
+    shipping_infos = get_shipping_quote(
         zip_code=zip_code, service_code=shipping_service_code
     )  # Validate at the backend
 
@@ -96,15 +93,6 @@ def render_authenticated_checkout(request):
     if not order.cart_items:
         return redirect("store")
 
-    payment_form = PaymentForm(prefix="payment_form")
-    shipping_form = ShippingAddressForm(prefix="shipping_form", page="checkout")
-    credit_card_form = CreditCardForm(
-        prefix="credit_card_form", cart_total=order.cart_total
-    )
-    addresses = ShippingAddress.objects.filter(customer=request.user.customer).order_by(
-        "-main"
-    )
-
     if request.method == "POST":
         shipping_address = ShippingAddress.objects.get(
             pk=int(request.POST["user_addresses_form-addresses"])
@@ -124,15 +112,22 @@ def render_authenticated_checkout(request):
         # TODO: Send email to customer
         return redirect("order_success", transaction_id=order.transaction_id)
 
+    addresses = ShippingAddress.objects.filter(customer=request.user.customer).order_by(
+        "-main"
+    )
     return render(
         request,
         "store/checkout_authenticated.html",
         {
             **context,
             "addresses": addresses,
-            "shipping_form": shipping_form,
-            "payment_form": payment_form,
-            "credit_card_form": credit_card_form,
+            "shipping_form": ShippingAddressForm(
+                prefix="shipping_form", page="checkout"
+            ),
+            "payment_form": PaymentForm(prefix="payment_form"),
+            "credit_card_form": CreditCardForm(
+                prefix="credit_card_form", cart_total=order.cart_total
+            ),
         },
     )
 
@@ -144,13 +139,6 @@ def render_checkout(request):
     if not order.cart_items:
         return redirect("store")
 
-    user_form = CustomUserCreationForm(prefix="user_form")
-    customer_form = CustomerCreationForm(prefix="customer_form")
-    shipping_form = ShippingAddressForm(prefix="shipping_form", page="checkout")
-    payment_form = PaymentForm(prefix="payment_form")
-    credit_card_form = CreditCardForm(
-        prefix="credit_card_form", cart_total=order.cart_total
-    )
     if request.method == "POST":
         shipping_form = ShippingAddressForm(
             request.POST, prefix="shipping_form", page="checkout"
@@ -158,9 +146,6 @@ def render_checkout(request):
         user_form = CustomUserCreationForm(request.POST, prefix="user_form")
         customer_form = CustomerCreationForm(request.POST, prefix="customer_form")
         payment_form = PaymentForm(request.POST, prefix="payment_form")
-        credit_card_form = CreditCardForm(
-            prefix="credit_card_form", cart_total=order.cart_total
-        )
 
         if (
             user_form.is_valid()
@@ -192,6 +177,11 @@ def render_checkout(request):
             response = redirect("order_success", transaction_id=order.transaction_id)
             response.delete_cookie("device")
             return response
+    else:
+        user_form = CustomUserCreationForm(prefix="user_form")
+        customer_form = CustomerCreationForm(prefix="customer_form")
+        shipping_form = ShippingAddressForm(prefix="shipping_form", page="checkout")
+        payment_form = PaymentForm(prefix="payment_form")
 
     return render(
         request,
@@ -202,48 +192,8 @@ def render_checkout(request):
             "user_form": user_form,
             "customer_form": customer_form,
             "payment_form": payment_form,
-            "credit_card_form": credit_card_form,
+            "credit_card_form": CreditCardForm(
+                prefix="credit_card_form", cart_total=order.cart_total
+            ),
         },
     )
-
-
-def _get_shipping_infos(zip_code, service_code):
-    """
-    Funcao responsavel por obter as opcoes de frete de um (ou todos) tipo de servico de um pedido
-
-    Args:
-        zip_code (int): O CEP do destinatário;
-        service_code (list): Lista de código de servicos se quisermos consultar alguns tipos de
-            servicos especificos.
-    """
-
-    if isinstance(zip_code, str):
-        zip_code = exclude_mask_chars(zip_code)
-
-    url = "http://ws.correios.com.br/calculador/CalcPrecoPrazo.aspx?"
-    url += urlencode(
-        {
-            "sCepOrigem": 88037310,
-            "sCepDestino": zip_code,
-            "nVlPeso": 1,
-            "nCdFormato": 1,
-            "nVlComprimento": 30,
-            "nVlAltura": 20,
-            "nVlLargura": 20,
-            "sCdMaoPropria": "n",
-            "nVlValorDeclarado": 0,
-            "sCdAvisoRecebimento": "n",
-            "nCdServico": service_code,
-            "nVlDiametro": 0,
-            "StrRetorno": "xml",
-            "nIndicaCalculo": 3,
-        }
-    )
-
-    tree = ElementTree.fromstring(requests.get(url).text)
-    return {
-        "Valor": tree.find("cServico").findtext("Valor"),
-        "PrazoEntrega": tree.find("cServico").findtext("PrazoEntrega"),
-        "Erro": tree.find("cServico").findtext("Erro"),
-        "MsgErro": tree.find("cServico").findtext("MsgErro"),
-    }
@@ -1,3 +1,5 @@
+from operator import mul
+
 from django.contrib.auth.validators import UnicodeUsernameValidator
 
 
@@ -7,27 +9,50 @@ class CustomUnicodeUsernameValidator(UnicodeUsernameValidator):
     message = "Entre um usuário válido. 150 caracteres ou menos. Apenas letras."
 
 
-def cpf_is_valid(cpf):
-    """Funcao que checa se um cpf eh valido"""
-
-    def get_cpf_sum(cpf, _range):
-        _sum = 0
-        for char, i in zip(cpf, _range):
-            _sum += int(char) * i
-        return _sum
-
-    if len(cpf) != 11:
-        return False
+# CPF check digits are computed over the ASCII codes of the digits, so the "0" offset
+# (48 * weight) is subtracted once per sum instead of converting every char with int()
+FIRST_DIGIT_WEIGHTS = tuple(range(10, 1, -1))
+SECOND_DIGIT_WEIGHTS = tuple(range(11, 1, -1))
+FIRST_DIGIT_OFFSET = ord("0") * sum(FIRST_DIGIT_WEIGHTS)
+SECOND_DIGIT_OFFSET = ord("0") * sum(SECOND_DIGIT_WEIGHTS)
 
-    if len(set(cpf)) == 1:
-        return False
 
-    first_digit_sum = get_cpf_sum(cpf, range(10, 1, -1))
-    if int(cpf[-2]) != (first_digit_sum * 10) % 11:
-        return False
-
-    second_digit_sum = get_cpf_sum(cpf, range(11, 1, -1))
-    if int(cpf[-1]) != (second_digit_sum * 10) % 11:
-        return False
-
-    return True
+def cpf_is_valid(cpf):
+    """Funcao que checa se um cpf eh valido"""
+    return cpfs_are_valid([cpf])[0]
+
+
+def cpfs_are_valid(cpfs):
+    """
+    Funcao que checa, em lote, se cpfs sao validos.
+
+    Args:
+        cpfs (iterable): CPFs sem mascara.
+
+    Returns:
+        results (list): Lista de booleanos, na mesma ordem de `cpfs`.
+    """
+    zero = ord("0")
+    results = []
+    append = results.append
+    for cpf in cpfs:
+        if len(cpf) != 11 or not cpf.isdigit() or not cpf.isascii():
+            append(False)
+            continue
+
+        if len(set(cpf)) == 1:
+            append(False)
+            continue
+
+        digits = cpf.encode("ascii")
+        first_digit_sum = (
+            sum(map(mul, FIRST_DIGIT_WEIGHTS, digits)) - FIRST_DIGIT_OFFSET
+        )
+        second_digit_sum = (
+            sum(map(mul, SECOND_DIGIT_WEIGHTS, digits)) - SECOND_DIGIT_OFFSET
+        )
+        append(
+            digits[9] - zero == first_digit_sum * 10 % 11 % 10
+            and digits[10] - zero == second_digit_sum * 10 % 11 % 10
+        )
+    return results
@@ -1,16 +1,25 @@
+import csv
 from decimal import Decimal
+import io
 import json
 from uuid import uuid4
 
 from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.core.paginator import Paginator
 from django.shortcuts import redirect, render
 from django.http import JsonResponse
 from django.utils.http import urlsafe_base64_decode
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
+from .cep import get_cep_index
 from .choices import PAC, SEDEX
+from .conditional import get_order_etag, get_product_etag
 from .forms import (
     CustomAuthenticationForm,
     CustomerCreationForm,
@@ -22,11 +31,25 @@ from .forms import (
     ShippingAddressForm,
     ShippingAddressChangeForm,
 )
-from .helpers import exclude_mask_chars, get_installment_options
+from .helpers import get_installment_options, update_session
+from .media import resolve_product_media_urls
 from .models import CustomUser, Order, OrderItem, Product, ShippingAddress
+from .pagination import (
+    CATALOG_ORDERING,
+    CATALOG_PAGE_SIZE,
+    ORDERS_ORDERING,
+    ORDERS_PAGE_SIZE,
+    paginate_keyset,
+)
+from .search import search_products, SEARCH_PAGE_SIZE
+from .shipping_quotes import (
+    get_shipping_quote,
+    prefetch_customer_quotes,
+    prefetch_quotes,
+)
+from .tracking import get_columns, import_tracking_codes
 from .utils import (
     get_context,
-    _get_shipping_infos,
     render_authenticated_checkout,
     render_checkout,
 )
@@ -38,10 +61,20 @@ def store(request):
     delete_cokie = context.pop("delete_cookie", False)
     cookie = context.pop("set_cookie", False)
 
+    page = paginate_keyset(
+        Product.objects.all(),
+        CATALOG_ORDERING,
+        request.GET.get("cursor"),
+        CATALOG_PAGE_SIZE,
+    )
     response = render(
         request,
         "store/store.html",
-        {**context, "products": Product.objects.all()},
+        {
+            **context,
+            "page": page,
+            "products": resolve_product_media_urls(page.object_list),
+        },
     )
 
     if delete_cokie:
@@ -54,8 +87,29 @@ def store(request):
     return response
 
 
+def search(request):
+    """Funcao responsavel pela view da busca de produtos"""
+    query = request.GET.get("q", "").strip()
+    products = search_products(Product.objects.order_by("pk"), query)
+    page = Paginator(products, SEARCH_PAGE_SIZE).get_page(request.GET.get("page"))
+    return render(
+        request,
+        "store/search.html",
+        {
+            **get_context(request),
+            "query": query,
+            "page": page,
+            "products": resolve_product_media_urls(page.object_list),
+        },
+    )
+
+
 def cart(request):
-    return render(request, "store/cart.html", get_context(request))
+    context = get_context(request)
+    if request.user.is_authenticated and context["items"]:
+        # ready (in the cache) by the time the customer reaches the checkout
+        prefetch_customer_quotes(request.user.customer)
+    return render(request, "store/cart.html", context)
 
 
 def checkout(request):
@@ -109,9 +163,6 @@ def register(request):
     if request.user.is_authenticated:
         return redirect("store")
 
-    user_form = CustomUserCreationForm(prefix="user_form", page="register")
-    customer_form = CustomerCreationForm(prefix="customer_form", page="register")
-
     if request.method == "POST":
         user_form = CustomUserCreationForm(
             request.POST, prefix="user_form", page="register"
@@ -128,6 +179,9 @@ def register(request):
             response = redirect("store")
             response.delete_cookie("device")
             return response
+    else:
+        user_form = CustomUserCreationForm(prefix="user_form", page="register")
+        customer_form = CustomerCreationForm(prefix="customer_form", page="register")
 
     return render(
         request,
@@ -143,25 +197,13 @@ def register(request):
 def register_address_from_checkout(request):
     """View responsavel por registrar um endereço da pagina de checkout"""
     data = json.loads(request.body)
-
-    if ShippingAddress.objects.filter(customer=request.user.customer):
-        main = False
-    else:
-        main = True
-
-    ShippingAddress.objects.create(
-        customer=request.user.customer,
-        zip_code=exclude_mask_chars(data["shippingFormData"]["zip_code"]),
-        address=data["shippingFormData"]["address"],
-        number=data["shippingFormData"]["number"],
-        neighborhood=data["shippingFormData"]["neighborhood"],
-        complement=data["shippingFormData"]["complement"],
-        reference=data["shippingFormData"]["reference"],
-        city=data["shippingFormData"]["city"],
-        uf=data["shippingFormData"]["uf"],
-        country=data["shippingFormData"]["country"],
-        main=main,
-    )
+    # the same validation (CEP, city and UF) as the address forms
+    shipping_form = ShippingAddressForm(data["shippingFormData"])
+    if not shipping_form.is_valid():
+        return JsonResponse(
+            {"errors": shipping_form.errors.get_json_data()}, status=400
+        )
+    shipping_form.save(customer=request.user.customer)
     return JsonResponse("", safe=False)
 
 
@@ -169,23 +211,29 @@ def login_user(request):
     """Funcao responsavel pela view de login do cliente"""
     if request.user.is_authenticated:
         return redirect("store")
-    authentication_form = CustomAuthenticationForm()
+    status = 200
     if request.method == "POST":
-        authentication_form = CustomAuthenticationForm(data=request.POST)
+        authentication_form = CustomAuthenticationForm(request, data=request.POST)
         if authentication_form.is_valid():
-            user = authenticate(
-                request,
-                email=request.POST.get("username"),
-                password=request.POST.get("password"),
-            )
-            login(request, user)
+            # the form already authenticated the user (hashing the password again
+            # would double the cost of every login)
+            login(request, authentication_form.get_user())
             return redirect("store")
-        messages.error(request, "E-mail ou senha incorretos!")
+        if authentication_form.has_error(NON_FIELD_ERRORS, "too_many_attempts"):
+            status = 429
+            messages.error(
+                request, "Muitas tentativas de login. Tente novamente mais tarde!"
+            )
+        else:
+            messages.error(request, "E-mail ou senha incorretos!")
+    else:
+        authentication_form = CustomAuthenticationForm()
 
     return render(
         request,
         "store/login.html",
         {**get_context(request), "authentication_form": authentication_form},
+        status=status,
     )
 
 
@@ -199,7 +247,6 @@ def forgot_password(request):
     if request.user.is_authenticated:
         return redirect("store")
 
-    form = CustomPasswordResetForm()
     if request.method == "POST":
         form = CustomPasswordResetForm(request.POST)
         if form.is_valid() and CustomUser.objects.filter(email=request.POST["email"]):
@@ -209,13 +256,15 @@ def forgot_password(request):
                 from_email=settings.EMAIL_HOST_USER,
                 request=request,
             )
-            request.session["email"] = request.POST["email"]
+            update_session(request.session, email=request.POST["email"])
             return redirect("password_reset_done")
 
         messages.warning(
             request,
             f'Parece que o e-mail "{request.POST["email"]}" não está cadastrado no sistema...',
         )
+    else:
+        form = CustomPasswordResetForm()
     return render(
         request, "store/forgot_password.html", {**get_context(request), "form": form}
     )
@@ -233,12 +282,13 @@ def password_reset_confirm(request, uidb64, token):  # pylint: disable=unused-ar
     """View responsável por redefinir a senha"""
     # TODO: Make this view expirable
     user = CustomUser.objects.get(pk=urlsafe_base64_decode(uidb64).decode())
-    form = CustomSetPasswordForm(user=user)
     if request.method == "POST":
         form = CustomSetPasswordForm(user=user, data=request.POST)
         if form.is_valid():
             form.save()
             return redirect("password_reset_complete")
+    else:
+        form = CustomSetPasswordForm(user=user)
 
     return render(
         request,
@@ -251,6 +301,8 @@ def password_reset_complete(request):
     return render(request, "store/password_reset_complete.html", get_context(request))
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_product_etag)
 def view_product(request, product_id):
     return render(
         request,
@@ -290,19 +342,25 @@ def order_success(request, transaction_id):
 
 @login_required(login_url="/login")
 def user_page(request):
-    orders = (
-        Order.objects.filter(customer=request.user.customer)
-        .exclude(status="analysing")
-        .order_by("-requested_at")
+    orders = Order.objects.filter(
+        customer=request.user.customer, requested_at__isnull=False
+    ).exclude(status="analysing")
+    page = paginate_keyset(
+        orders.select_related("payment"),
+        ORDERS_ORDERING,
+        request.GET.get("cursor"),
+        ORDERS_PAGE_SIZE,
     )
     return render(
         request,
         "store/user_page.html",
-        {**get_context(request), "orders": orders},
+        {**get_context(request), "page": page, "orders": page.object_list},
     )
 
 
 @login_required(login_url="/login")
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_order_etag)
 def view_order(request, order_id):
     """Funcao responsavel pela view de visualizacao de um pedido do cliente"""
     try:
@@ -315,6 +373,12 @@ def view_order(request, order_id):
         )
 
     requested_items = requested_order.orderitem_set.all().order_by("id")
+    # stored by the poll_shipments command: the carrier is never called from here
+    shipment_events = (
+        requested_order.shipping_service.shipmentevent_set.all()
+        if requested_order.shipping_service
+        else []
+    )
     return render(
         request,
         "store/view_order.html",
@@ -322,6 +386,7 @@ def view_order(request, order_id):
             **get_context(request),
             "requested_order": requested_order,
             "requested_items": requested_items,
+            "shipment_events": shipment_events,
         },
     )
 
@@ -329,7 +394,6 @@ def view_order(request, order_id):
 @login_required(login_url="/login")
 def view_profile(request):
     """Funcao responsavel pela view de visualizacao dos dados do cliente"""
-    form = CustomUserChangeForm(user=request.user)
     if request.method == "POST":
         form = CustomUserChangeForm(request.POST, user=request.user)
         if form.is_valid():
@@ -342,6 +406,8 @@ def view_profile(request):
                 messages.warning(
                     request, "Modifique algum dado para alterar sua conta!"
                 )
+    else:
+        form = CustomUserChangeForm(user=request.user)
     return render(
         request,
         "store/view_profile.html",
@@ -367,24 +433,31 @@ def view_address(request, address_id):
             {**get_context(request), "form": None, "address_id": None},
         )
 
-    shipping_address = ShippingAddress.objects.get(pk=address_id)
-    form = ShippingAddressChangeForm(shipping_address=shipping_address)
+    status = 200
     if request.method == "POST":
         form = ShippingAddressChangeForm(
             request.POST, shipping_address=shipping_address
         )
-        new_values = form.is_valid()
-        if new_values:
-            shipping_address = form.save(new_values, customer=request.user.customer)
-            form = ShippingAddressChangeForm(shipping_address=shipping_address)
-            messages.success(request, "Dados alterados com sucesso!")
+        if form.is_valid():
+            new_values = form.get_changed_values()
+            if new_values:
+                shipping_address = form.save(new_values, customer=request.user.customer)
+                form = ShippingAddressChangeForm(shipping_address=shipping_address)
+                messages.success(request, "Dados alterados com sucesso!")
+            else:
+                messages.warning(
+                    request, "Modifique algum dado para alterar o endereço!"
+                )
         else:
-            messages.warning(request, "Modifique algum dado para alterar o endereço!")
+            status = 400
+    else:
+        form = ShippingAddressChangeForm(shipping_address=shipping_address)
 
     return render(
         request,
         "store/view_address.html",
         {**get_context(request), "form": form, "address_id": address_id},
+        status=status,
     )
 
 
@@ -404,12 +477,13 @@ def view_all_addresses(request):
 
 @login_required(login_url="/login")
 def register_address(request):
-    form = ShippingAddressForm(page="user")
     if request.method == "POST":
         form = ShippingAddressForm(request.POST, page="user")
         if form.is_valid():
             form.save(customer=request.user.customer)
             return redirect("view_all_addresses")
+    else:
+        form = ShippingAddressForm(page="user")
     return render(
         request,
         "store/register_address.html",
@@ -422,8 +496,33 @@ def get_shipping_infos(request):
     zip_code = json.loads(request.body)["zip_code"]
     return JsonResponse(
         {
-            "PAC": _get_shipping_infos(zip_code=zip_code, service_code=PAC),
-            "SEDEX": _get_shipping_infos(zip_code=zip_code, service_code=SEDEX),
+            "PAC": get_shipping_quote(zip_code=zip_code, service_code=PAC),
+            "SEDEX": get_shipping_quote(zip_code=zip_code, service_code=SEDEX),
+        }
+    )
+
+
+def get_zip_code_infos(request, zip_code):
+    """
+    Funcao responsavel por obter o endereco de um CEP a partir do indice local de CEPs.
+
+    A resposta segue o formato do ViaCEP, consumido pelo autopreenchimento dos formularios.
+    """
+    cep_index = get_cep_index()
+    zip_code_infos = cep_index.lookup(zip_code) if cep_index is not None else None
+    if zip_code_infos is None:
+        return JsonResponse({"erro": True})
+
+    # the checkout asks for the quotes of the CEP right after this lookup
+    prefetch_quotes([zip_code_infos["zip_code"]])
+    return JsonResponse(
+        {
+            "cep": zip_code_infos["zip_code"],
+            "logradouro": zip_code_infos["address"],
+            "complemento": "",
+            "bairro": zip_code_infos["neighborhood"],
+            "localidade": zip_code_infos["city"],
+            "uf": zip_code_infos["uf"],
         }
     )
 
@@ -437,3 +536,40 @@ def load_credit_card_installments(request):
         "store/credit_card_dropdown_installments_options.html",
         {"installments": installments},
     )
+
+
+@staff_member_required
+def upload_tracking_codes(request):
+    """
+    Funcao responsavel pela view de envio do arquivo de postagem com os codigos de
+    rastreio dos pedidos
+    """
+    context = {**get_context(request), "delimiters": (",", ";")}
+    if request.method == "POST" and "file" in request.FILES:
+        reader = csv.DictReader(
+            io.TextIOWrapper(request.FILES["file"].file, encoding="utf-8-sig"),
+            delimiter=";" if request.POST.get("delimiter") == ";" else ",",
+        )
+        updated = shipped = 0
+        rejected = []
+        # the file is decoded as it is read: a bad byte can come after the header
+        try:
+            get_columns(reader.fieldnames)
+            for chunk_updated, chunk_shipped, chunk_rejected in import_tracking_codes(
+                reader, changed_by=request.user
+            ):
+                updated += chunk_updated
+                shipped += chunk_shipped
+                rejected.extend(chunk_rejected)
+        except (ValueError, UnicodeDecodeError) as error:
+            context["error"] = str(error)
+            return render(request, "store/upload_tracking_codes.html", context)
+        context.update(
+            {
+                "file_name": request.FILES["file"].name,
+                "updated": updated,
+                "shipped": shipped,
+                "rejected": rejected,
+            }
+        )
+    return render(request, "store/upload_tracking_codes.html", context)